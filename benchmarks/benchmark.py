@@ -0,0 +1,242 @@
+"""Benchmark the WSPR.live update pipeline against a local stub server.
+
+Canned wspr.live responses of several sizes are served by a stub HTTP
+server standing in for WSPR_LIVE_URL. Throughput and peak memory are
+reported for each stage of an update:
+
+- fetch: HTTP round trip and streaming decode by the blocking client
+- decode: decoding the response body already in memory
+- enrich: building spots with band labels, countries and miles
+- attributes: converting spots to state attribute dicts
+
+Run from the repository root:
+
+    python benchmarks/benchmark.py
+    python benchmarks/benchmark.py --sizes 100 10000 --update-baseline
+
+The run fails when a stage is slower, or its peak memory larger, than its
+baseline by more than the tolerances. Baselines depend on the machine, so
+record them where the benchmark is run.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components import client as wspr_client  # noqa: E402
+from custom_components.coordinator import build_spots  # noqa: E402
+from custom_components.formats import (  # noqa: E402
+    FORMAT_JSON_COMPACT_EACH_ROW,
+    decode_rows,
+)
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+DEFAULT_SIZES = (100, 10_000, 1_000_000)
+
+# Seconds each stage is timed for, at least one run
+MIN_TIMING = 0.5
+
+# A stage fails when its throughput drops by more than this share of the
+# baseline, which leaves room for the noise of shared machines, or when its
+# peak memory, which hardly varies between runs, grows by more than this share
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_MEMORY_TOLERANCE = 0.1
+
+CALLSIGN = "G0IKV"
+
+OTHER_CALLSIGNS = (
+    "K1ABC", "W6XYZ", "VE3AAA", "DL1ABC", "F5XYZ", "EA8/DL1ZZZ", "JA1AAA",
+    "VK2XYZ", "ZL1AB", "PY2AA", "LU1ABC", "ZS6AB", "9A1AA", "OH2AB", "SM5XYZ",
+    "UA3ABC", "R9XYZ", "BY1AA", "HL1AB", "VU2ABC", "KH6XYZ", "KL7AB", "TF3AB",
+)
+
+BANDS = (-1, 0, 1, 3, 5, 7, 10, 14, 18, 21, 24, 28, 50)
+
+
+def build_fixture(size, seed=0):
+    """Return a JSONCompactEachRow response body of size spot rows."""
+    rnd = random.Random(seed)
+    lines = []
+    for index in range(size):
+        other = rnd.choice(OTHER_CALLSIGNS)
+        tx_sign, rx_sign = (CALLSIGN, other) if index % 2 else (other, CALLSIGN)
+        lines.append(json.dumps([
+            f"2026-10-18 {index // 3600 % 24:02d}:{index // 60 % 60:02d}:00",
+            tx_sign, rx_sign, rnd.choice(BANDS), rnd.randint(-30, 10),
+            rnd.randint(0, 19_000), rnd.randint(0, 359),
+        ]))
+    return ("\n".join(lines) + "\n").encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve the current fixture for every query."""
+
+    body = b""
+
+    def do_GET(self):
+        """Send the fixture."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        """Keep the benchmark output clean."""
+
+
+def measure(stage, rows, run):
+    """Run a stage and return its result, throughput and peak memory.
+
+    Tracing allocations slows a stage down, so it is timed on its own first:
+    repeatedly for MIN_TIMING seconds, keeping the fastest run. It then runs
+    once more under tracemalloc.
+    """
+    elapsed = None
+    timing_end = time.perf_counter() + MIN_TIMING
+    while elapsed is None or time.perf_counter() < timing_end:
+        gc.collect()
+        start = time.perf_counter()
+        result = run()
+        run_time = time.perf_counter() - start
+        elapsed = run_time if elapsed is None else min(elapsed, run_time)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    result = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "stage": stage,
+        "rows": rows,
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(rows / elapsed),
+        "peak_mib": round(peak / 2**20, 2),
+    }
+
+
+def run_size(size):
+    """Benchmark every stage for one fixture size."""
+    body = build_fixture(size)
+    StubHandler.body = body
+    fetch_client = wspr_client.WSPRLiveClient(None)
+    results = []
+    try:
+        rows, result = measure("fetch", size, lambda: list(
+            fetch_client.iter_rows("SELECT 1", FORMAT_JSON_COMPACT_EACH_ROW)
+        ))
+        results.append(result)
+    finally:
+        fetch_client.close()
+    assert len(rows) == size, f"fetched {len(rows)} of {size} rows"
+
+    text = body.decode()
+    _, result = measure(
+        "decode", size, lambda: decode_rows(FORMAT_JSON_COMPACT_EACH_ROW, text)
+    )
+    results.append(result)
+    del text
+
+    spots, result = measure("enrich", size, lambda: build_spots(rows, "rx"))
+    results.append(result)
+    del rows
+
+    _, result = measure(
+        "attributes", size, lambda: [spot.as_dict() for spot in spots]
+    )
+    results.append(result)
+    return results
+
+
+def check_baseline(results, baseline, tolerance, memory_tolerance):
+    """Return the stages slower or larger than their baseline allows."""
+    regressions = []
+    for result in results:
+        expected = baseline.get(str(result["rows"]), {}).get(result["stage"])
+        if expected is None:
+            continue
+        if result["rows_per_second"] < expected["rows_per_second"] * (1 - tolerance):
+            regressions.append(
+                (result, "rows_per_second", expected["rows_per_second"])
+            )
+        if result["peak_mib"] > expected["peak_mib"] * (1 + memory_tolerance):
+            regressions.append((result, "peak_mib", expected["peak_mib"]))
+    return regressions
+
+
+def main():
+    """Run the benchmarks and compare them with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="store the measured throughput and peak memory as the new baseline",
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wspr_client.WSPR_LIVE_URL = (
+        f"http://127.0.0.1:{server.server_port}/?query={{query}}"
+    )
+
+    results = []
+    print(f"{'rows':>9} {'stage':<11} {'seconds':>9} {'rows/s':>12} {'peak MiB':>9}")
+    try:
+        for size in args.sizes:
+            for result in run_size(size):
+                results.append(result)
+                print(
+                    f"{result['rows']:>9} {result['stage']:<11} "
+                    f"{result['seconds']:>9.4f} {result['rows_per_second']:>12} "
+                    f"{result['peak_mib']:>9.2f}"
+                )
+    finally:
+        server.shutdown()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.update_baseline:
+        for result in results:
+            baseline.setdefault(str(result["rows"]), {})[result["stage"]] = {
+                "rows_per_second": result["rows_per_second"],
+                "peak_mib": result["peak_mib"],
+            }
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = check_baseline(
+        results, baseline, args.tolerance, args.memory_tolerance
+    )
+    for result, metric, expected in regressions:
+        print(
+            f"Regression: {result['stage']} at {result['rows']} rows has "
+            f"{metric} {result[metric]}, baseline {expected}"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
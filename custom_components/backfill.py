@@ -0,0 +1,213 @@
+"""Backfill of a callsign's spot history into the spot store."""
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from .const import DEFAULT_FORMAT, DOMAIN
+from .coordinator import DATA_COORDINATORS, TIME_FORMAT, build_spots
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_BACKFILLS = "backfills"
+
+# wspr.live holds spots from March 2008 onwards
+HISTORY_START = date(2008, 3, 1)
+
+DEFAULT_CHUNK_DAYS = 7
+DEFAULT_PARALLEL = 4
+
+# Chunks ending within this delay are not checkpointed, as wspr.live may
+# still receive late uploads for them
+CHECKPOINT_DELAY = timedelta(hours=1)
+
+# Every spot sent or received by a callsign within a time range, with the
+# bearing from the transmitter and from the receiver
+CHUNK_QUERY = (
+    "SELECT time, tx_sign, rx_sign, band, snr, distance, azimuth, rx_azimuth "
+    "FROM wspr.rx "
+    "WHERE (tx_sign = '{callsign}' OR rx_sign = '{callsign}') "
+    "AND time >= toDateTime('{start}') AND time < toDateTime('{end}') "
+    "ORDER BY time DESC"
+)
+
+
+def build_chunks(start, end, chunk_days):
+    """Return the (start, end) chunks covering a time range, newest first."""
+    chunks = []
+    chunk_start = datetime.combine(start, datetime.min.time())
+    step = timedelta(days=chunk_days)
+    while chunk_start < end:
+        chunks.append((chunk_start, min(chunk_start + step, end)))
+        chunk_start += step
+    chunks.reverse()
+    return chunks
+
+
+def is_covered(ranges, start, end):
+    """Return whether sorted (start, end) ranges together cover start to end.
+
+    Times are TIME_FORMAT strings, which sort like the times they hold.
+    """
+    covered_until = start
+    for range_start, range_end in ranges:
+        if range_start > covered_until:
+            break
+        covered_until = max(covered_until, range_end)
+        if covered_until >= end:
+            return True
+    return False
+
+
+class Backfill:
+    """Load the history of a callsign in time chunks, a few at a time.
+
+    Every finished chunk is checkpointed in the store, so a run that is
+    interrupted picks up with the chunks still missing when started again.
+    """
+
+    def __init__(
+        self, client, store, callsign, start=HISTORY_START,
+        chunk_days=DEFAULT_CHUNK_DAYS, parallel=DEFAULT_PARALLEL,
+        output_format=DEFAULT_FORMAT, pool=None,
+    ):
+        """Initialize the backfill."""
+        self.callsign = callsign
+        self.start = start
+        self.chunk_days = chunk_days
+        self.output_format = output_format
+        self._client = client
+        self._store = store
+        # EnrichmentPool for large chunks, which are otherwise enriched in-process
+        self._pool = pool
+        self._semaphore = asyncio.Semaphore(parallel)
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.chunks_failed = 0
+        self.rows = 0
+        self._started = None
+        self._finished = None
+
+    @property
+    def rows_per_second(self):
+        """Return the backfill throughput so far."""
+        if self._started is None:
+            return 0.0
+        elapsed = (self._finished or time.monotonic()) - self._started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    async def _async_fetch_chunk(self, hass, chunk_start, chunk_end, checkpoint):
+        """Fetch, enrich and store the spots of one chunk."""
+        rows = {"tx": [], "rx": []}
+
+        def add_row(row):
+            """Sort a row into the callsign's TX or RX spots."""
+            if row[1] == self.callsign:
+                rows["tx"].append(row[:7])
+            if row[2] == self.callsign:
+                rows["rx"].append((*row[:6], row[7]))
+
+        start = chunk_start.strftime(TIME_FORMAT)
+        end = chunk_end.strftime(TIME_FORMAT)
+        query = CHUNK_QUERY.format(callsign=self.callsign, start=start, end=end)
+        async with self._semaphore:
+            try:
+                await self._client.async_consume_rows(
+                    query, self.output_format, add_row
+                )
+            except Exception as err:
+                self.chunks_failed += 1
+                _LOGGER.warning(
+                    "Backfill of %s failed for the chunk from %s: %s",
+                    self.callsign, start, err,
+                )
+                return
+
+        if self._pool is not None:
+            spots = {
+                mode: await self._pool.async_build_spots(hass, mode_rows, mode)
+                for mode, mode_rows in rows.items()
+            }
+        else:
+            spots = {
+                mode: build_spots(mode_rows, mode) for mode, mode_rows in rows.items()
+            }
+        if checkpoint:
+            await hass.async_add_executor_job(
+                self._store.complete_chunk, self.callsign, start, end, spots
+            )
+        else:
+            for mode, mode_spots in spots.items():
+                await hass.async_add_executor_job(
+                    self._store.add_spots, self.callsign, mode, mode_spots
+                )
+        self.chunks_done += 1
+        self.rows += len(spots["tx"]) + len(spots["rx"])
+        _LOGGER.debug(
+            "Backfilled %s from %s: %d/%d chunks, %d rows, %.0f rows/s",
+            self.callsign, start, self.chunks_done, self.chunks_total,
+            self.rows, self.rows_per_second,
+        )
+
+    async def async_run(self, hass):
+        """Fetch every chunk not fully covered by checkpoints.
+
+        Checkpoints of earlier runs may use other chunk sizes, so a chunk is
+        only skipped when the ranges already backfilled span all of it.
+        """
+        now = datetime.utcnow()
+        completed = await hass.async_add_executor_job(
+            self._store.completed_chunks, self.callsign
+        )
+        chunks = [
+            (chunk_start, chunk_end)
+            for chunk_start, chunk_end in build_chunks(self.start, now, self.chunk_days)
+            if not is_covered(
+                completed,
+                chunk_start.strftime(TIME_FORMAT),
+                chunk_end.strftime(TIME_FORMAT),
+            )
+        ]
+        self.chunks_total = len(chunks)
+        _LOGGER.info(
+            "Backfilling %s since %s: %d chunks of %d days to fetch",
+            self.callsign, self.start, self.chunks_total, self.chunk_days,
+        )
+        self._started = time.monotonic()
+        await asyncio.gather(*(
+            self._async_fetch_chunk(
+                hass, chunk_start, chunk_end,
+                chunk_end <= now - CHECKPOINT_DELAY,
+            )
+            for chunk_start, chunk_end in chunks
+        ))
+        self._finished = time.monotonic()
+        _LOGGER.info(
+            "Backfilled %s: %d rows in %d chunks, %d failed, %.0f rows/s",
+            self.callsign, self.rows, self.chunks_done, self.chunks_failed,
+            self.rows_per_second,
+        )
+
+
+def async_start_backfill(hass, client, store, callsign, **options):
+    """Start a backfill of a callsign in the background."""
+    backfills = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_BACKFILLS, {})
+    if callsign in backfills:
+        _LOGGER.warning("A backfill of %s is already running", callsign)
+        return None
+    backfill = Backfill(client, store, callsign, **options)
+    backfills[callsign] = backfill
+
+    async def async_run():
+        """Run the backfill, then refresh the records of the callsign."""
+        try:
+            await backfill.async_run(hass)
+        finally:
+            del backfills[callsign]
+        coordinators = hass.data[DOMAIN].get(DATA_COORDINATORS, {})
+        for coordinator in coordinators.values():
+            if coordinator.store is not None and callsign in coordinator.callsigns:
+                await coordinator.async_request_refresh()
+
+    hass.async_create_task(async_run())
+    return backfill
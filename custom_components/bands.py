@@ -0,0 +1,77 @@
+"""Band label resolution for WSPR.live spots."""
+from bisect import bisect_right
+
+# Band codes stored by wspr.live in the band column
+BAND_CODES = {
+    -1: "2200M",
+    0: "630M",
+    1: "160M",
+    3: "80M",
+    5: "60M",
+    7: "40M",
+    10: "30M",
+    13: "22M",
+    14: "20M",
+    18: "17M",
+    21: "15M",
+    24: "12M",
+    28: "10M",
+    40: "8M",
+    50: "6M",
+    70: "4M",
+    144: "2M",
+    432: "70CM",
+    1296: "23CM",
+}
+
+# Amateur allocations as (lower edge, upper edge, label) in MHz, sorted by
+# frequency. Edges span the widest allocation of any ITU region.
+BAND_EDGES = (
+    (0.1357, 0.1378, "2200M"),
+    (0.472, 0.479, "630M"),
+    (1.8, 2.0, "160M"),
+    (3.5, 4.0, "80M"),
+    (5.06, 5.45, "60M"),
+    (7.0, 7.3, "40M"),
+    (10.1, 10.15, "30M"),
+    (13.553, 13.567, "22M"),
+    (14.0, 14.35, "20M"),
+    (18.068, 18.168, "17M"),
+    (21.0, 21.45, "15M"),
+    (24.89, 24.99, "12M"),
+    (28.0, 29.7, "10M"),
+    (40.0, 40.7, "8M"),
+    (50.0, 54.0, "6M"),
+    (70.0, 70.5, "4M"),
+    (144.0, 148.0, "2M"),
+    (420.0, 450.0, "70CM"),
+    (1240.0, 1300.0, "23CM"),
+)
+
+_LOWER_EDGES = [lower for lower, _upper, _label in BAND_EDGES]
+
+
+def determine_band_label(band_mhz):
+    """Convert a wspr.live band code or a frequency in MHz to a band label."""
+    # Band codes are integers, and equal floats such as 14.0 hash the same
+    label = BAND_CODES.get(band_mhz)
+    if label is not None:
+        return label
+    if band_mhz is None or band_mhz == "":
+        return ""
+
+    try:
+        value = float(band_mhz)
+    except (TypeError, ValueError):
+        return f"{band_mhz}m"
+    label = BAND_CODES.get(value)
+    if label is not None:
+        return label
+
+    # Otherwise find the allocation containing the frequency
+    index = bisect_right(_LOWER_EDGES, value) - 1
+    if index >= 0 and value <= BAND_EDGES[index][1]:
+        return BAND_EDGES[index][2]
+
+    # Default to frequency + m
+    return f"{band_mhz}m"
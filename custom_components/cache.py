@@ -0,0 +1,106 @@
+"""Cache of wspr.live query results shared by all coordinators."""
+import asyncio
+import time
+
+# Seconds a response is served from the cache
+CACHE_TTL = 60
+
+
+def normalize_query(query, output_format):
+    """Return the cache key of a query, ignoring differences in whitespace."""
+    return " ".join(f"{query} FORMAT {output_format}".split())
+
+
+class ResponseCache:
+    """TTL cache of query results with single-flight fetching.
+
+    Results are decoded rows, or what a caller builds from streamed rows.
+    Concurrent requests for a key that is being fetched wait for that fetch
+    rather than sending their own request. The fetch runs in a task of its
+    own, so a cancelled caller does not cancel it for the others. Cached
+    results are shared between callers, who must not modify them. Failed
+    fetches are not cached.
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        """Initialize the cache."""
+        self._ttl = ttl
+        # Key -> (expiry, result, owners the result was handed to)
+        self._entries = {}
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.waiters = 0
+        self.waiter_errors = 0
+
+    def _prune(self, now):
+        """Drop expired entries."""
+        expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+        for key in expired:
+            del self._entries[key]
+
+    async def async_get(self, key, fetch, owner=None):
+        """Return the result cached for key, calling fetch() to get it on a miss.
+
+        An owner, such as a coordinator, is not served a cached result it was
+        handed before, so its repeated requests always fetch fresh data.
+        """
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry[0] > time.monotonic()
+            and (owner is None or owner not in entry[2])
+        ):
+            self.hits += 1
+            if owner is not None:
+                entry[2].add(owner)
+            return entry[1]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            try:
+                result = await asyncio.shield(task)
+            except Exception:
+                self.waiter_errors += 1
+                raise
+            self.waiters += 1
+            if owner is not None and key in self._entries:
+                self._entries[key][2].add(owner)
+            return result
+
+        self.misses += 1
+        task = asyncio.get_running_loop().create_task(
+            self._async_fetch(key, fetch, owner)
+        )
+        # Retrieve the exception of a fetch every caller stopped waiting for
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _async_fetch(self, key, fetch, owner):
+        """Fetch and cache the result of a key."""
+        try:
+            result = await fetch()
+        finally:
+            del self._in_flight[key]
+        now = time.monotonic()
+        self._prune(now)
+        self._entries[key] = (now + self._ttl, result, {owner} - {None})
+        return result
+
+    def stats(self):
+        """Return the cache counters.
+
+        Waiters whose shared fetch failed count as requests but not as hits.
+        """
+        requests = self.hits + self.misses + self.waiters + self.waiter_errors
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "waiters": self.waiters,
+            "waiter_errors": self.waiter_errors,
+            "hit_ratio": (
+                round((self.hits + self.waiters) / requests, 3) if requests else None
+            ),
+        }
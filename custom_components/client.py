@@ -0,0 +1,294 @@
+"""Shared HTTP clients for wspr.live queries."""
+import asyncio
+import threading
+import time
+from urllib.parse import quote
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from yarl import URL
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    DEFAULT_FORMAT,
+    DEFAULT_POOL_SIZE,
+    DOMAIN,
+    REQUEST_TIMEOUT,
+    WSPR_LIVE_URL,
+)
+from .cache import ResponseCache, normalize_query
+from .formats import decode_rows, line_decoder
+from .resilience import RETRIES, RequestGuard, is_transient
+
+DATA_CLIENT = "client"
+DATA_ASYNC_CLIENT = "async_client"
+DATA_REQUEST_GUARD = "request_guard"
+
+# Serializes creating the shared clients and guard, as get_client runs in
+# executor threads
+_CREATE_LOCK = threading.Lock()
+
+
+def build_url(query, output_format=DEFAULT_FORMAT):
+    """Return the wspr.live URL for a ClickHouse query."""
+    return WSPR_LIVE_URL.format(query=quote(f"{query} FORMAT {output_format}"))
+
+
+class WSPRLiveClient:
+    """Blocking wspr.live client backed by a pooled keep-alive session.
+
+    Requests are rate limited and retried by a RequestGuard, which is shared
+    with the async client so both draw on one budget.
+    Failures while a response is streaming are not retried, as some of its
+    rows have already been handed out.
+    """
+
+    def __init__(self, hass, pool_size=DEFAULT_POOL_SIZE, guard=None):
+        """Initialize the client."""
+        self._hass = hass
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        self.guard = guard if guard is not None else RequestGuard()
+        self.cache = ResponseCache()
+
+    def _get(self, url, stream=False):
+        """Send a GET request, retrying transient failures."""
+        trial = self.guard.breaker.check()
+        try:
+            return self._get_with_retries(url, stream)
+        finally:
+            if trial:
+                self.guard.breaker.release_trial()
+
+    def _get_with_retries(self, url, stream):
+        """Send a GET request the breaker let through."""
+        attempt = 0
+        while True:
+            time.sleep(self.guard.bucket.reserve())
+            response = None
+            try:
+                response = self._session.get(
+                    url, timeout=REQUEST_TIMEOUT, stream=stream
+                )
+                response.raise_for_status()
+            except Exception as err:
+                if response is not None:
+                    response.close()
+                if not is_transient(err):
+                    raise
+                if attempt >= RETRIES:
+                    self.guard.breaker.record_failure()
+                    raise
+                time.sleep(self.guard.retry_delay(attempt, err))
+                attempt += 1
+                continue
+            self.guard.breaker.record_success()
+            return response
+
+    def query(self, query, output_format=DEFAULT_FORMAT, metrics=None):
+        """Run a query and return the decoded rows."""
+        response = self._get(build_url(query, output_format))
+        if metrics is None:
+            return decode_rows(output_format, response.text)
+        metrics.body_bytes += len(response.content)
+        with metrics.time("decode"):
+            return decode_rows(output_format, response.text)
+
+    async def async_query(
+        self, query, output_format=DEFAULT_FORMAT, metrics=None, owner=None
+    ):
+        """Run a query in an executor thread, sharing cached responses."""
+        return await self.cache.async_get(
+            normalize_query(query, output_format),
+            lambda: self._hass.async_add_executor_job(
+                self.query, query, output_format, metrics
+            ),
+            owner,
+        )
+
+    def iter_rows(self, query, output_format=DEFAULT_FORMAT, metrics=None):
+        """Run a query and yield its rows while the response streams in."""
+        decode = line_decoder(output_format)
+        if decode is None:
+            yield from self.query(query, output_format, metrics)
+            return
+
+        with self._get(build_url(query, output_format), stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    if metrics is not None:
+                        metrics.body_bytes += len(line) + 1
+                        start = time.perf_counter()
+                    row = decode(line.decode("utf-8"))
+                    if metrics is not None:
+                        metrics.add("decode", time.perf_counter() - start)
+                    if row is not None:
+                        yield row
+
+    def consume_rows(self, query, output_format, handle_row, metrics=None):
+        """Run a query and pass each row to handle_row as it arrives."""
+        for row in self.iter_rows(query, output_format, metrics):
+            handle_row(row)
+
+    async def async_consume_rows(self, query, output_format, handle_row, metrics=None):
+        """Stream a query's rows to handle_row from an executor thread."""
+        await self._hass.async_add_executor_job(
+            self.consume_rows, query, output_format, handle_row, metrics
+        )
+
+    def close(self):
+        """Close the pooled connections."""
+        self._session.close()
+
+
+class AsyncWSPRLiveClient:
+    """Non-blocking wspr.live client using Home Assistant's shared aiohttp session.
+
+    Requests are rate limited and retried like those of WSPRLiveClient.
+    """
+
+    def __init__(self, session, pool_size=DEFAULT_POOL_SIZE, guard=None):
+        """Initialize the client."""
+        self._session = session
+        # Bound the number of in-flight requests to wspr.live across all sensors
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self.guard = guard if guard is not None else RequestGuard()
+        self.cache = ResponseCache()
+
+    async def _async_get(self, url):
+        """Send a GET request, retrying transient failures."""
+        trial = self.guard.breaker.check()
+        try:
+            return await self._async_get_with_retries(url)
+        finally:
+            if trial:
+                self.guard.breaker.release_trial()
+
+    async def _async_get_with_retries(self, url):
+        """Send a GET request the breaker let through."""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.guard.bucket.reserve())
+            response = None
+            try:
+                response = await self._session.get(url, timeout=self._timeout)
+                response.raise_for_status()
+            except Exception as err:
+                if response is not None:
+                    response.release()
+                if not is_transient(err):
+                    raise
+                if attempt >= RETRIES:
+                    self.guard.breaker.record_failure()
+                    raise
+                await asyncio.sleep(self.guard.retry_delay(attempt, err))
+                attempt += 1
+                continue
+            self.guard.breaker.record_success()
+            return response
+
+    async def _async_fetch(self, query, output_format, metrics=None):
+        """Run a query and return the decoded rows."""
+        url = URL(build_url(query, output_format), encoded=True)
+        async with self._semaphore:
+            async with await self._async_get(url) as response:
+                body = await response.read()
+                text = body.decode(response.get_encoding())
+        if metrics is None:
+            return decode_rows(output_format, text)
+        metrics.body_bytes += len(body)
+        with metrics.time("decode"):
+            return decode_rows(output_format, text)
+
+    async def async_query(
+        self, query, output_format=DEFAULT_FORMAT, metrics=None, owner=None
+    ):
+        """Run a query and return the decoded rows, sharing cached responses."""
+        return await self.cache.async_get(
+            normalize_query(query, output_format),
+            lambda: self._async_fetch(query, output_format, metrics),
+            owner,
+        )
+
+    async def async_iter_rows(self, query, output_format=DEFAULT_FORMAT, metrics=None):
+        """Run a query and yield its rows while the response streams in."""
+        decode = line_decoder(output_format)
+        if decode is None:
+            for row in await self._async_fetch(query, output_format, metrics):
+                yield row
+            return
+
+        url = URL(build_url(query, output_format), encoded=True)
+        async with self._semaphore:
+            async with await self._async_get(url) as response:
+                async for line in response.content:
+                    if metrics is not None:
+                        metrics.body_bytes += len(line)
+                    line = line.rstrip(b"\r\n")
+                    if line:
+                        if metrics is not None:
+                            start = time.perf_counter()
+                        row = decode(line.decode("utf-8"))
+                        if metrics is not None:
+                            metrics.add("decode", time.perf_counter() - start)
+                        if row is not None:
+                            yield row
+
+    async def async_consume_rows(self, query, output_format, handle_row, metrics=None):
+        """Run a query and pass each row to handle_row as it arrives."""
+        async for row in self.async_iter_rows(query, output_format, metrics):
+            handle_row(row)
+
+
+def _get_request_guard(domain_data):
+    """Return the RequestGuard shared by both clients, creating it on first use.
+
+    Callers hold _CREATE_LOCK.
+    """
+    guard = domain_data.get(DATA_REQUEST_GUARD)
+    if guard is None:
+        guard = RequestGuard()
+        domain_data[DATA_REQUEST_GUARD] = guard
+    return guard
+
+
+def get_client(hass, pool_size=DEFAULT_POOL_SIZE):
+    """Return the blocking client shared by all WSPR.live sensors of this instance."""
+    with _CREATE_LOCK:
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        client = domain_data.get(DATA_CLIENT)
+        if client is not None:
+            return client
+        client = WSPRLiveClient(hass, pool_size, _get_request_guard(domain_data))
+        domain_data[DATA_CLIENT] = client
+
+    def close_client(event):
+        """Close the shared client when Home Assistant stops."""
+        client.close()
+
+    hass.bus.listen_once(EVENT_HOMEASSISTANT_STOP, close_client)
+    return client
+
+
+def async_get_client(hass, pool_size=DEFAULT_POOL_SIZE):
+    """Return the async client shared by all WSPR.live sensors of this instance."""
+    with _CREATE_LOCK:
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        client = domain_data.get(DATA_ASYNC_CLIENT)
+        if client is None:
+            client = AsyncWSPRLiveClient(
+                async_get_clientsession(hass), pool_size,
+                _get_request_guard(domain_data),
+            )
+            domain_data[DATA_ASYNC_CLIENT] = client
+    return client
@@ -0,0 +1,27 @@
+"""Constants for the WSPR.live integration."""
+
+DOMAIN = "wspr_live"
+
+WSPR_LIVE_URL = "https://db1.wspr.live/?query={query}"
+
+CONF_ADAPTIVE = "adaptive"
+CONF_CALLSIGNS = "callsigns"
+CONF_DIAGNOSTICS = "diagnostics"
+CONF_ENRICH_WORKERS = "enrich_workers"
+CONF_FORMAT = "format"
+CONF_POOL_SIZE = "pool_size"
+CONF_SLIM_ATTRIBUTES = "slim_attributes"
+CONF_STATISTICS = "statistics"
+CONF_STORE = "store"
+CONF_SUMMARY = "summary"
+
+# Maximum number of pooled keep-alive connections to wspr.live
+DEFAULT_POOL_SIZE = 10
+
+CONF_USE_ASYNC = "use_async"
+
+# Seconds to wait for a wspr.live response
+REQUEST_TIMEOUT = 20
+
+# ClickHouse output format of spot queries, see formats.py
+DEFAULT_FORMAT = "JSONCompactEachRow"
@@ -0,0 +1,544 @@
+"""Data update coordinator for WSPR.live spots."""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .bands import determine_band_label
+from .cache import normalize_query
+from .const import DEFAULT_FORMAT, DOMAIN
+from .countries import country_cache_stats, determine_country
+from .enrich import enrich_columns
+from .formats import FORMAT_JSON_COMPACT_EACH_ROW
+from .metrics import CoordinatorMetrics, PollMetrics
+from .scheduler import AdaptiveSchedule
+from .spot import Spot
+from .stats import STATISTICS_WINDOWS, StationStats
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_COORDINATORS = "coordinators"
+
+# Spots kept per direction
+MAX_SPOTS = 100
+
+# Spots older than this are dropped from the window
+WINDOW = timedelta(days=1)
+
+# Spots are uploaded to wspr.live with some delay, so incremental queries
+# re-read this many minutes before the newest spot already seen
+INCREMENTAL_OVERLAP_MINUTES = 15
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Spots sent and received by a set of callsigns, at most MAX_SPOTS per
+# callsign and direction. Each direction is limited on its own, so a spot
+# between two of the callsigns comes back once for each of them, tagged
+# with the direction it was selected for. The bearing is the direction
+# from the station, towards the receiver of TX spots and towards the
+# transmitter of RX spots.
+SPOTS_QUERY = (
+    "SELECT time, tx_sign, rx_sign, band, snr, distance, bearing, direction FROM ("
+    "SELECT time, tx_sign, rx_sign, band, snr, distance, azimuth AS bearing, "
+    "'tx' AS direction "
+    "FROM wspr.rx "
+    "WHERE tx_sign IN ({callsigns}) AND time >= now() - INTERVAL 1 DAY{since} "
+    "ORDER BY time DESC{tx_limit} "
+    "UNION ALL "
+    "SELECT time, tx_sign, rx_sign, band, snr, distance, rx_azimuth AS bearing, "
+    "'rx' AS direction "
+    "FROM wspr.rx "
+    "WHERE rx_sign IN ({callsigns}) AND time >= now() - INTERVAL 1 DAY{since} "
+    "ORDER BY time DESC{rx_limit}"
+    ") ORDER BY time DESC"
+)
+
+# Limit of each direction of SPOTS_QUERY, left out when every spot is kept
+SPOTS_LIMIT = " LIMIT {limit} BY {column}"
+
+# Per callsign and direction aggregates over the last day. The other side of
+# each spot is counted by its first four characters, which is all the country
+# lookup needs, so countries can be resolved without fetching every callsign.
+SUMMARY_QUERY = (
+    "SELECT station, direction, toUInt32(count()) AS spots, "
+    "max(distance) AS max_distance, "
+    "argMax(other, distance) AS max_distance_callsign, "
+    "median(snr) AS median_snr, "
+    "sumMap([band], [toUInt32(1)]) AS band_counts, "
+    "sumMap([substring(other, 1, 4)], [toUInt32(1)]) AS prefix_counts "
+    "FROM ("
+    "SELECT tx_sign AS station, 'tx' AS direction, rx_sign AS other, "
+    "band, snr, distance "
+    "FROM wspr.rx WHERE tx_sign IN ({callsigns}) AND time >= now() - INTERVAL 1 DAY "
+    "UNION ALL "
+    "SELECT rx_sign AS station, 'rx' AS direction, tx_sign AS other, "
+    "band, snr, distance "
+    "FROM wspr.rx WHERE rx_sign IN ({callsigns}) AND time >= now() - INTERVAL 1 DAY"
+    ") GROUP BY station, direction"
+)
+
+SINCE_CONDITION = (
+    " AND time >= toDateTime('{last_seen}') - INTERVAL {overlap} MINUTE"
+)
+
+
+def build_spots(rows, mode, columns=None):
+    """Convert spot rows into spots for a TX or RX sensor.
+
+    Rows hold the time, tx_sign, rx_sign, band, snr, distance and bearing
+    columns.
+
+    The derived columns are computed unless given, e.g. by worker processes.
+    """
+    if not rows:
+        return []
+    times, tx_signs, rx_signs, bands, snrs, distances, bearings = zip(*rows)
+    if columns is None:
+        columns = enrich_columns(mode, tx_signs, rx_signs, bands, distances)
+    return [
+        Spot(*values)
+        for values in zip(
+            times, tx_signs, rx_signs, bands, columns["band_label"], snrs,
+            distances, columns["distance_miles"], columns["country"], bearings,
+        )
+    ]
+
+
+def build_summary(row=None):
+    """Convert a SUMMARY_QUERY row into summary attributes."""
+    if row is None:
+        return {
+            "total_spots": 0,
+            "max_distance": None,
+            "max_distance_callsign": None,
+            "median_snr": None,
+            "band_counts": {},
+            "country_counts": {},
+        }
+
+    (
+        _station, _direction, spots, max_distance, max_distance_callsign,
+        median_snr, band_count_map, prefix_count_map,
+    ) = row
+
+    # sumMap widens its counts to UInt64, which the JSON formats quote
+    band_counts = {}
+    for band, count in zip(*band_count_map):
+        label = determine_band_label(band)
+        band_counts[label] = band_counts.get(label, 0) + int(count)
+
+    country_counts = {}
+    for prefix, count in zip(*prefix_count_map):
+        country = determine_country(prefix)
+        country_counts[country] = country_counts.get(country, 0) + int(count)
+
+    return {
+        "total_spots": int(spots),
+        "max_distance": max_distance,
+        "max_distance_callsign": max_distance_callsign,
+        "median_snr": median_snr,
+        "band_counts": band_counts,
+        "country_counts": dict(
+            sorted(country_counts.items(), key=lambda item: item[1], reverse=True)
+        ),
+    }
+
+
+def spots_fingerprint(spots):
+    """Return a value that changes whenever the set of spots changes."""
+    return hash(tuple(spot.key for spot in spots))
+
+
+def merge_spots(window, new_spots, cutoff):
+    """Merge new spots into a window, newest first, dropping expired spots."""
+    merged = {spot.key: spot for spot in window}
+    merged.update((spot.key, spot) for spot in new_spots)
+    spots = [spot for spot in merged.values() if (spot.time or "") >= cutoff]
+    spots.sort(key=lambda spot: spot.time, reverse=True)
+    return spots[:MAX_SPOTS]
+
+
+class SpotCollector:
+    """Turn streamed SPOTS_QUERY rows into the new spots of each station.
+
+    Rows arrive newest first, so once a station's direction holds limit
+    rows every further row for it would be trimmed from the window anyway
+    and is skipped before it is enriched. Memory is then bounded by the
+    limit rather than by the response size. Without a limit every row is
+    kept, e.g. for the spot store.
+    """
+
+    def __init__(self, callsigns, limit=MAX_SPOTS):
+        """Initialize the collector."""
+        self._rows = {callsign: {"tx": [], "rx": []} for callsign in callsigns}
+        self._limit = limit
+        self.rows = 0
+        self.newest = None
+
+    def add_row(self, row):
+        """Route one row to the station and direction it was selected for."""
+        self.rows += 1
+        row_time = row[0]
+        if row_time and (self.newest is None or row_time > self.newest):
+            self.newest = row_time
+
+        direction = row[7]
+        station = self._rows.get(row[1] if direction == "tx" else row[2])
+        if station is not None and (
+            self._limit is None or len(station[direction]) < self._limit
+        ):
+            station[direction].append(row[:7])
+
+    async def async_build_spots(self, hass, pool=None):
+        """Return the enriched spots of every station and direction.
+
+        With an EnrichmentPool, large batches are enriched off the event loop.
+        """
+        if pool is None:
+            return {
+                callsign: {
+                    mode: build_spots(rows, mode) for mode, rows in station.items()
+                }
+                for callsign, station in self._rows.items()
+            }
+        return {
+            callsign: {
+                mode: await pool.async_build_spots(hass, rows, mode)
+                for mode, rows in station.items()
+            }
+            for callsign, station in self._rows.items()
+        }
+
+
+class WSPRLiveCoordinator(DataUpdateCoordinator):
+    """Fetch the TX and RX spots of a set of callsigns in a single query."""
+
+    def __init__(
+        self, hass, client, callsigns, interval_minutes, summary=False,
+        output_format=DEFAULT_FORMAT, store=None, adaptive=False, statistics=False,
+        pool=None,
+    ):
+        """Initialize the coordinator."""
+        # Coordinators of the same callsigns differ by these options, which
+        # are named to tell their diagnostics and diagnostic sensors apart
+        options = [
+            option
+            for option, enabled in (
+                ("summary", summary),
+                ("store", store is not None),
+                ("statistics", statistics),
+            )
+            if enabled
+        ]
+        name = f"WSPR Live {', '.join(callsigns)}"
+        if options:
+            name = f"{name} ({', '.join(options)})"
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=timedelta(minutes=interval_minutes),
+        )
+        self.callsigns = tuple(callsigns)
+        self.summary = summary
+        self.output_format = output_format
+        self.store = store
+        # The store and statistics get every new spot, not only those kept
+        # in the window
+        self._keep_all_spots = store is not None or statistics
+        self._client = client
+        # EnrichmentPool for polls bringing large batches, e.g. the first poll
+        # with every spot of the last day kept
+        self._pool = pool
+        # With an adaptive schedule, interval_minutes is the longest idle interval
+        self._schedule = (
+            AdaptiveSchedule(timedelta(minutes=interval_minutes)) if adaptive else None
+        )
+        self._spots = {
+            callsign: {"tx": [], "rx": []} for callsign in self.callsigns
+        }
+        # Newest spot time seen so far, as returned by wspr.live
+        self._last_seen = None
+        # Spots whose store write failed, retried with the next poll's spots
+        self._unstored = {
+            callsign: {"tx": [], "rx": []} for callsign in self.callsigns
+        }
+        self._statistics = None
+        # Statistics are seeded from the store on the first poll
+        self._statistics_seeded = store is None
+        if statistics:
+            self._statistics = {
+                callsign: {mode: StationStats(mode) for mode in ("tx", "rx")}
+                for callsign in self.callsigns
+            }
+        self.metrics = CoordinatorMetrics()
+        self.has_diagnostic_entities = False
+        # PollProfiler armed by the profile service, None while disarmed
+        self.profiler = None
+
+    def _build_query(self):
+        """Return the query for spots not yet in the window."""
+        since = ""
+        if self._last_seen is not None:
+            since = SINCE_CONDITION.format(
+                last_seen=self._last_seen, overlap=INCREMENTAL_OVERLAP_MINUTES
+            )
+        tx_limit = rx_limit = ""
+        if not self._keep_all_spots:
+            tx_limit = SPOTS_LIMIT.format(limit=MAX_SPOTS, column="tx_sign")
+            rx_limit = SPOTS_LIMIT.format(limit=MAX_SPOTS, column="rx_sign")
+        return SPOTS_QUERY.format(
+            callsigns=self._callsign_list(), since=since,
+            tx_limit=tx_limit, rx_limit=rx_limit,
+        )
+
+    def _callsign_list(self):
+        """Return the callsigns as a quoted SQL list."""
+        return ", ".join(f"'{callsign}'" for callsign in self.callsigns)
+
+    async def _async_fetch_summaries(self):
+        """Fetch the aggregates of every callsign and direction."""
+        # Aggregates hold nested arrays, which only the JSON formats carry well
+        rows = await self._client.async_query(
+            SUMMARY_QUERY.format(callsigns=self._callsign_list()),
+            FORMAT_JSON_COMPACT_EACH_ROW,
+            owner=self,
+        )
+        summaries = {
+            callsign: {"tx": build_summary(), "rx": build_summary()}
+            for callsign in self.callsigns
+        }
+        for row in rows:
+            station = summaries.get(row[0])
+            if station is not None and row[1] in station:
+                station[row[1]] = build_summary(row)
+        return summaries
+
+    async def _async_collect_spots(self, metrics):
+        """Stream the new spots into a collector, shared by identical polls.
+
+        The response cache holds the collector rather than the response, so
+        rows beyond the collector's limit are never held in memory. Other
+        coordinators may reuse it, but this one's next poll fetches again.
+        """
+        query = self._build_query()
+
+        async def async_fetch():
+            """Stream the query's rows into a new collector."""
+            collector = SpotCollector(
+                self.callsigns, None if self._keep_all_spots else MAX_SPOTS
+            )
+            await self._client.async_consume_rows(
+                query, self.output_format, collector.add_row, metrics=metrics
+            )
+            return collector
+
+        return await self._client.cache.async_get(
+            normalize_query(query, self.output_format), async_fetch, self
+        )
+
+    def _store_spots(self, new_spots):
+        """Append new spots to the store and return the updated records."""
+        records = {}
+        for callsign, station in new_spots.items():
+            records[callsign] = {}
+            for mode, spots in station.items():
+                self.store.add_spots(callsign, mode, spots)
+                records[callsign][mode] = self.store.all_records(callsign, mode)
+        return records
+
+    def _load_statistics_seed(self):
+        """Return the stored spots within the longest statistics window."""
+        since = (
+            datetime.utcnow() - max(STATISTICS_WINDOWS.values())
+        ).strftime(TIME_FORMAT)
+        return {
+            callsign: {
+                mode: build_spots(self.store.spot_rows(callsign, mode, since), mode)
+                for mode in ("tx", "rx")
+            }
+            for callsign in self.callsigns
+        }
+
+    def diagnostics(self):
+        """Return the poll metrics of the coordinator and its client."""
+        return {
+            **self.metrics.as_dict(),
+            "client": {
+                "retries": self._client.guard.retries,
+                "circuit_breaker": self._client.guard.breaker.state,
+                "cache": self._client.cache.stats(),
+            },
+            "country_cache": country_cache_stats(),
+        }
+
+    @callback
+    def async_update_listeners(self):
+        """Update the sensors, timing how long publishing their states takes."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        if self.metrics.last is not None:
+            self.metrics.last.add("publish", time.perf_counter() - start)
+
+    async def _async_update_data(self):
+        """Poll wspr.live, recording the timings and counters of the poll."""
+        metrics = PollMetrics()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start()
+        try:
+            with metrics.time("poll"):
+                data = await self._async_poll(metrics)
+        except Exception:
+            self.metrics.record_error(metrics)
+            raise
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                if profiler.done:
+                    self.profiler = None
+                    await self.hass.async_add_executor_job(profiler.write)
+        if data["stale"]:
+            self.metrics.record_error(metrics)
+        else:
+            self.metrics.record_poll(metrics)
+        return data
+
+    async def _async_poll(self, metrics):
+        """Fetch new spots of the callsigns and merge them into their windows."""
+        _LOGGER.debug(
+            "Updating WSPR Live spots for %s since %s",
+            ", ".join(self.callsigns), self._last_seen or "the last day",
+        )
+        try:
+            with metrics.time("fetch"):
+                collector = await self._async_collect_spots(metrics)
+        except Exception as err:
+            if self.data is None:
+                raise UpdateFailed(f"Failed to fetch WSPR.live data: {err}") from err
+            # Keep serving the last good data rather than blanking the sensors
+            _LOGGER.warning("%s serving stale spots: %s", self.name, err)
+            return {**self.data, "stale": True}
+
+        summaries = None
+        if self.summary:
+            try:
+                with metrics.time("summary"):
+                    summaries = await self._async_fetch_summaries()
+            except Exception as err:
+                # A failed aggregate query must not take the spots down with it
+                _LOGGER.warning("%s serving stale summaries: %s", self.name, err)
+                if self.data is not None:
+                    summaries = self.data["summaries"]
+
+        active = collector.newest is not None and (
+            self._last_seen is None or collector.newest > self._last_seen
+        )
+        if active:
+            self._last_seen = collector.newest
+        if self._schedule is not None:
+            self._schedule.record(active)
+            self.update_interval = self._schedule.next_interval(time.time())
+
+        metrics.rows = collector.rows
+        now = datetime.utcnow()
+        with metrics.time("enrich"):
+            new_spots = await collector.async_build_spots(self.hass, self._pool)
+            cutoff = (now - WINDOW).strftime(TIME_FORMAT)
+            for callsign, station in new_spots.items():
+                for mode, spots in station.items():
+                    self._spots[callsign][mode] = merge_spots(
+                        self._spots[callsign][mode], spots, cutoff
+                    )
+
+        statistics = None
+        if self._statistics is not None:
+            if not self._statistics_seeded:
+                self._statistics_seeded = True
+                seed = await self.hass.async_add_executor_job(
+                    self._load_statistics_seed
+                )
+                for callsign, station in seed.items():
+                    for mode, spots in station.items():
+                        self._statistics[callsign][mode].add_spots(
+                            spots, now, TIME_FORMAT
+                        )
+            with metrics.time("statistics"):
+                statistics = {
+                    callsign: {
+                        mode: self._statistics[callsign][mode].add_spots(
+                            spots, now, TIME_FORMAT
+                        )
+                        for mode, spots in station.items()
+                    }
+                    for callsign, station in new_spots.items()
+                }
+
+        records = None
+        if self.store is not None:
+            pending = {
+                callsign: {
+                    mode: self._unstored[callsign][mode] + spots
+                    for mode, spots in station.items()
+                }
+                for callsign, station in new_spots.items()
+            }
+            try:
+                with metrics.time("store"):
+                    records = await self.hass.async_add_executor_job(
+                        self._store_spots, pending
+                    )
+            except Exception as err:
+                # The spots are already in the windows; keep them for the next
+                # poll's write, as incremental queries will not fetch them again
+                _LOGGER.warning("%s could not store spots: %s", self.name, err)
+                self._unstored = pending
+                if self.data is not None:
+                    records = self.data["records"]
+            else:
+                self._unstored = {
+                    callsign: {"tx": [], "rx": []} for callsign in self.callsigns
+                }
+
+        _LOGGER.debug(
+            "%s fetched %d rows for %d stations",
+            self.name, collector.rows, len(self.callsigns),
+        )
+        _LOGGER.debug("Poll metrics: %s", metrics.as_dict())
+        _LOGGER.debug("Country cache stats: %s", country_cache_stats())
+        _LOGGER.debug("Response cache stats: %s", self._client.cache.stats())
+        return {
+            "stations": {
+                callsign: dict(station) for callsign, station in self._spots.items()
+            },
+            "summaries": summaries,
+            "records": records,
+            "statistics": statistics,
+            "stale": False,
+            "updated": now.isoformat(),
+        }
+
+
+def async_get_coordinator(
+    hass, client, callsigns, interval_minutes, summary=False,
+    output_format=DEFAULT_FORMAT, store=None, adaptive=False, statistics=False,
+    pool=None,
+):
+    """Return the coordinator for a set of callsigns, creating it on first use.
+
+    Coordinators are shared by sensors that poll the same callsigns with the
+    same summary, store and statistics options.
+    """
+    coordinators = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_COORDINATORS, {})
+    callsigns = tuple(sorted(callsigns))
+    key = (callsigns, summary, store is not None, statistics)
+    coordinator = coordinators.get(key)
+    if coordinator is None:
+        coordinator = WSPRLiveCoordinator(
+            hass, client, callsigns, interval_minutes, summary, output_format, store,
+            adaptive, statistics, pool,
+        )
+        coordinators[key] = coordinator
+    return coordinator
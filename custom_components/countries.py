@@ -0,0 +1,362 @@
+"""Callsign prefix to country resolution for WSPR.live spots."""
+import threading
+from collections import OrderedDict
+
+# Maximum number of base callsigns kept in the country cache
+COUNTRY_CACHE_SIZE = 4096
+
+# Callsign prefixes per country. A callsign resolves to the country of the
+# longest prefix it starts with, so more specific entries (e.g. "KH6") take
+# precedence over shorter ones (e.g. "K").
+COUNTRY_PREFIXES = {
+    "Spratly Islands": ("1S", "9M0"),
+    "Isle of Man": ("2D", "GD", "GT"),
+    "England": ("2E",),
+    "Northern Ireland": ("2I", "GI", "GN"),
+    "Jersey": ("2J", "GH", "GJ"),
+    "Scotland": ("2M", "2S", "GM", "GS"),
+    "Guernsey": ("2U", "GP", "GU"),
+    "Wales": ("2W", "GC", "GW"),
+    "Monaco": ("3A",),
+    "Mauritius": ("3B8",),
+    "Rodriguez Island": ("3B9",),
+    "Panama": ("3E", "3F", "H3", "H8", "H9", "HO", "HP"),
+    "Chile": ("3G", "CA", "CB", "CC", "CD", "CE", "XQ", "XR"),
+    "China": (
+        "3H", "3I", "3J", "3K", "3L", "3M", "3N", "3O", "3P", "3Q", "3R", "3S", "3T",
+        "3U", "BA", "BD", "BG", "BT", "BY", "BZ", "XS",
+    ),
+    "Vietnam": ("3W", "XV"),
+    "Poland": ("3Z", "HF", "SN", "SO", "SP", "SQ", "SR"),
+    "Mexico": (
+        "4A", "4B", "4C", "6D", "6E", "6F", "6G", "6H", "6I", "6J", "XA", "XB", "XC",
+        "XD", "XE", "XF", "XG", "XH", "XI",
+    ),
+    "Philippines": ("4D", "4E", "4F", "4G", "4H", "4I", "DU"),
+    "Azerbaijan": ("4J", "4K"),
+    "Georgia": ("4L",),
+    "Venezuela": ("4M", "YV", "YW", "YX", "YY"),
+    "Montenegro": ("4O",),
+    "Sri Lanka": ("4P", "4Q", "4R", "4S"),
+    "Peru": ("4T", "OA", "OB", "OC"),
+    "Haiti": ("4V", "HH"),
+    "Israel": ("4X", "4Z"),
+    "Libya": ("5A",),
+    "Cyprus": ("5B", "C4", "H2", "P3"),
+    "Morocco": ("5C", "5D", "5E", "5F", "5G", "CN"),
+    "Tanzania": ("5H", "5I"),
+    "Colombia": ("5J", "5K", "HK"),
+    "Nigeria": ("5N",),
+    "Denmark": ("5P", "5Q", "OU", "OV", "OW", "OZ", "XP"),
+    "Madagascar": ("5R",),
+    "Niger": ("5U",),
+    "Togo": ("5V",),
+    "Uganda": ("5X",),
+    "Kenya": ("5Z",),
+    "Egypt": ("6A", "6B", "SU"),
+    "Syria": ("6C", "YK"),
+    "South Korea": ("6K", "6L", "6M", "6N", "D7", "D8", "D9", "DS", "DT", "HL"),
+    "Pakistan": ("6P", "6Q", "6R", "6S", "AP", "AQ", "AR"),
+    "Senegal": ("6W",),
+    "Jamaica": ("6Y",),
+    "Indonesia": (
+        "7A", "7B", "7C", "7D", "7G", "7H", "7I", "8A", "8B", "8C", "8D", "8E", "8F",
+        "8G", "8H", "8I", "YB", "YC", "YD", "YE", "YF", "YG", "YH",
+    ),
+    "Japan": (
+        "7J", "7K", "7L", "7M", "7N", "8J", "8K", "8L", "8M", "8N", "JA", "JB", "JC",
+        "JD", "JE", "JF", "JG", "JH", "JI", "JJ", "JK", "JL", "JM", "JN", "JO", "JP",
+        "JQ", "JR", "JS",
+    ),
+    "Yemen": ("7O",),
+    "Lesotho": ("7P",),
+    "Malawi": ("7Q",),
+    "Sweden": (
+        "7S", "8S", "SA", "SB", "SC", "SD", "SE", "SF", "SG", "SH", "SI", "SJ", "SK",
+        "SL", "SM",
+    ),
+    "Algeria": ("7X",),
+    "Saudi Arabia": ("7Z", "8Z", "HZ"),
+    "Barbados": ("8P",),
+    "Maldives": ("8Q",),
+    "Guyana": ("8R",),
+    "Croatia": ("9A",),
+    "Iran": ("9D", "EP"),
+    "Ghana": ("9G",),
+    "Malta": ("9H",),
+    "Zambia": ("9J",),
+    "Kuwait": ("9K",),
+    "Sierra Leone": ("9L",),
+    "West Malaysia": ("9M2", "9M4"),
+    "East Malaysia": ("9M6", "9M8"),
+    "Malaysia": ("9M",),
+    "Nepal": ("9N",),
+    "Democratic Republic of the Congo": ("9Q",),
+    "Burundi": ("9U",),
+    "Singapore": ("9V",),
+    "Rwanda": ("9X",),
+    "Oman": ("A4",),
+    "Bhutan": ("A5",),
+    "United Arab Emirates": ("A6",),
+    "Qatar": ("A7",),
+    "Liberia": ("A8", "EL"),
+    "Bahrain": ("A9",),
+    "Spain": ("AM", "AN", "AO", "EA", "EB", "EC", "ED", "EE", "EF", "EG", "EH"),
+    "India": ("AT", "VU"),
+    "Argentina": ("AY", "AZ", "L2", "L3", "L4", "L5", "L6", "L7", "L8", "L9", "LU"),
+    "Taiwan (Quemoy Matsu)": ("BO",),
+    "Scarborough Reef": ("BS7",),
+    "Taiwan": ("BV", "BX"),
+    "Gambia": ("C5",),
+    "Bahamas": ("C6",),
+    "Mozambique": ("C8", "C9"),
+    "Easter Island": ("CE0A",),
+    "San Felix": ("CE0X",),
+    "Juan Fernandez Is.": ("CE0Z",),
+    "Canada": ("CF", "CG", "CH", "CI", "CJ", "CK", "CY", "CZ", "VA", "VE", "VO", "VY"),
+    "Cuba": ("CL", "CM", "CO", "T3"),
+    "Bolivia": ("CP",),
+    "Madeira": ("CQ3", "CR3", "CS3", "CT3", "CT9"),
+    "Portugal": ("CQ", "CR", "CS", "CT"),
+    "Azores": ("CU",),
+    "Uruguay": ("CV", "CW", "CX"),
+    "Angola": ("D2", "D3"),
+    "Cape Verde": ("D4",),
+    "Comoros": ("D6",),
+    "Germany": (
+        "DA", "DB", "DC", "DD", "DF", "DG", "DH", "DJ", "DK", "DL", "DM", "DN", "DO",
+        "DP", "DQ", "DR",
+    ),
+    "Thailand": ("E2", "HS"),
+    "Eritrea": ("E3",),
+    "Balearic Islands": ("EA6", "EB6", "EC6", "ED6", "EE6", "EF6", "EG6", "EH6"),
+    "Canary Islands": ("EA8", "EB8", "EC8", "ED8", "EE8", "EF8", "EG8", "EH8"),
+    "Ceuta and Melilla": ("EA9", "EB9", "EC9", "ED9", "EE9", "EF9", "EG9", "EH9"),
+    "Ireland": ("EI", "EJ"),
+    "Armenia": ("EK",),
+    "Ukraine": ("EM", "EN", "EO", "UR", "UT", "UU", "UV", "UW", "UX", "UY", "UZ"),
+    "Moldova": ("ER",),
+    "Estonia": ("ES",),
+    "Ethiopia": ("ET",),
+    "Belarus": ("EU", "EV", "EW"),
+    "Kyrgyzstan": ("EX",),
+    "Tajikistan": ("EY",),
+    "Turkmenistan": ("EZ",),
+    "Guadeloupe": ("FG",),
+    "Martinique": ("FM",),
+    "Saint Martin": ("FS",),
+    "French Guiana": ("FY",),
+    "France": ("F",),
+    "United Kingdom": ("G", "M"),
+    "Nicaragua": ("H6", "H7", "YN"),
+    "Hungary": ("HA", "HG"),
+    "Liechtenstein": ("HB0", "HE0"),
+    "Switzerland": ("HB", "HE"),
+    "Ecuador": ("HC", "HD"),
+    "Dominican Republic": ("HI",),
+    "Iraq": ("HN", "YI"),
+    "Honduras": ("HQ", "HR"),
+    "El Salvador": ("HU", "YS"),
+    "Vatican City": ("HV",),
+    "Sardinia": ("IM0", "IS0"),
+    "Sicily": ("IT9",),
+    "Italy": ("I",),
+    "Djibouti": ("J2",),
+    "Grenada": ("J3",),
+    "Dodecanese": ("J45", "SV5", "SW5", "SX5", "SZ5"),
+    "Crete": ("J49", "SV9", "SW9", "SX9", "SZ9"),
+    "Greece": ("J4", "SV", "SW", "SX", "SZ"),
+    "St. Lucia": ("J6",),
+    "Dominica": ("J7",),
+    "St. Vincent and the Grenadines": ("J8",),
+    "Mongolia": ("JT", "JU", "JV"),
+    "Svalbard": ("JW",),
+    "Jan Mayen": ("JX",),
+    "Jordan": ("JY",),
+    "Mariana Islands (USA)": ("KH0",),
+    "Baker & Howland Islands (USA)": ("KH1",),
+    "Guam (USA)": ("KH2",),
+    "Johnston Island (USA)": ("KH3",),
+    "Midway Island (USA)": ("KH4",),
+    "Palmyra & Jarvis Islands (USA)": ("KH5",),
+    "Hawaii (USA)": ("KH6", "KH7"),
+    "American Samoa (USA)": ("KH8",),
+    "Wake Island (USA)": ("KH9",),
+    "USA": ("K", "N", "W"),
+    "Alaska (USA)": ("KL",),
+    "Navassa Island (USA)": ("KP1",),
+    "US Virgin Islands": ("KP2",),
+    "Puerto Rico": ("KP3", "KP4"),
+    "Desecheo Island (USA)": ("KP5",),
+    "Norway": (
+        "LA", "LB", "LC", "LD", "LE", "LF", "LG", "LH", "LI", "LJ", "LK", "LL", "LM",
+        "LN",
+    ),
+    "Luxembourg": ("LX",),
+    "Lithuania": ("LY",),
+    "Bulgaria": ("LZ",),
+    "Lebanon": ("OD",),
+    "Austria": ("OE",),
+    "Finland": ("OF", "OG", "OH", "OI", "OJ"),
+    "Czech Republic": ("OK", "OL"),
+    "Slovak Republic": ("OM",),
+    "Belgium": ("ON", "OO", "OP", "OQ", "OR", "OS", "OT"),
+    "Faroe Islands": ("OY",),
+    "North Korea": ("P5",),
+    "Netherlands": ("PA", "PB", "PC", "PD", "PE", "PF", "PG", "PH", "PI"),
+    "Brazil": (
+        "PP", "PQ", "PR", "PS", "PT", "PU", "PV", "PW", "PX", "PY", "ZV", "ZW", "ZX",
+        "ZY", "ZZ",
+    ),
+    "Suriname": ("PZ",),
+    "Russia (Asiatic part)": (
+        "R0", "R8", "R9", "RA0", "RA9", "RC0", "RK0", "RK9", "RW0", "UA0", "UA9", "UB0",
+    ),
+    "Franz Josef Land": ("R1FJ",),
+    "Russia (European part)": ("R", "UA"),
+    "Bangladesh": ("S2",),
+    "Slovenia": ("S5",),
+    "Seychelles": ("S7",),
+    "Sao Tome and Principe": ("S9",),
+    "South Sudan": ("ST0",),
+    "Sudan": ("ST",),
+    "Afghanistan": ("T6", "YA"),
+    "Turkey": ("TA", "TB", "TC", "YM"),
+    "Guatemala": ("TD", "TG"),
+    "Costa Rica": ("TE", "TI"),
+    "Iceland": ("TF",),
+    "Cameroon": ("TJ",),
+    "Corsica": ("TK",),
+    "Central African Republic": ("TL",),
+    "Congo": ("TN",),
+    "Gabon": ("TR",),
+    "Chad": ("TT",),
+    "Ivory Coast": ("TU",),
+    "Benin": ("TY",),
+    "Mali": ("TZ",),
+    "Kaliningrad": ("UA2",),
+    "Uzbekistan": ("UJ", "UK"),
+    "Kazakhstan": ("UN", "UP", "UQ"),
+    "Antigua and Barbuda": ("V2",),
+    "Belize": ("V3",),
+    "St. Kitts and Nevis": ("V4",),
+    "Namibia": ("V5",),
+    "Brunei": ("V8",),
+    "Australia": ("VK", "VL"),
+    "Anguilla": ("VP2E",),
+    "Montserrat": ("VP2M",),
+    "British Virgin Islands": ("VP2V",),
+    "Hong Kong": ("VR",),
+    "Andaman & Nicobar Islands": ("VU4",),
+    "Laccadive Islands": ("VU7",),
+    "Cambodia": ("XU",),
+    "Laos": ("XW",),
+    "Macau": ("XX9",),
+    "Myanmar": ("XY", "XZ"),
+    "Latvia": ("YL",),
+    "Romania": ("YO", "YP", "YQ", "YR"),
+    "Serbia": ("YT", "YU"),
+    "Zimbabwe": ("Z2",),
+    "North Macedonia": ("Z3",),
+    "Albania": ("ZA",),
+    "Gibraltar": ("ZB2",),
+    "St. Helena": ("ZD7",),
+    "Ascension Island": ("ZD8",),
+    "Tristan da Cunha & Gough Island": ("ZD9",),
+    "New Zealand": ("ZL", "ZM"),
+    "Paraguay": ("ZP",),
+    "South Africa": ("ZR", "ZS", "ZT", "ZU"),
+}
+
+
+def _compile_prefix_index(table):
+    """Flatten the prefix table into a prefix -> country lookup index."""
+    index = {}
+    for country, prefixes in table.items():
+        for prefix in prefixes:
+            if prefix in index:
+                raise ValueError(
+                    f"Prefix {prefix} is assigned to both {index[prefix]} and {country}"
+                )
+            index[prefix] = country
+    return index, max(len(prefix) for prefix in index)
+
+
+_PREFIX_INDEX, _MAX_PREFIX_LEN = _compile_prefix_index(COUNTRY_PREFIXES)
+
+
+class LRUCache:
+    """Size-bounded least-recently-used cache with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize):
+        """Initialize the cache."""
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = compute(key)
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        """Return the cache counters."""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self._maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_COUNTRY_CACHE = LRUCache(COUNTRY_CACHE_SIZE)
+
+
+def _lookup_country(base_call):
+    """Return the country of the longest matching prefix of a base callsign."""
+    index = _PREFIX_INDEX
+    for length in range(min(len(base_call), _MAX_PREFIX_LEN), 0, -1):
+        country = index.get(base_call[:length])
+        if country is not None:
+            return country
+    return "Unknown"
+
+
+def determine_country(callsign):
+    """Determine the country based on callsign prefix."""
+    if not callsign:
+        return "Unknown"
+
+    # For callsigns like TA4/G8SCU, use the first part
+    base_call = callsign.upper().split("/", 1)[0]
+    if len(base_call) < 2:
+        return "Unknown"
+
+    return _COUNTRY_CACHE.get(base_call, _lookup_country)
+
+
+def country_cache_stats():
+    """Return hit, miss and eviction counters of the country cache."""
+    return _COUNTRY_CACHE.stats()
@@ -0,0 +1,146 @@
+"""Decoders for the ClickHouse output formats requested from wspr.live.
+
+Every decoder turns a response body into a list of rows, each row being a
+sequence of column values in SELECT order. Line based formats can also be
+decoded one line at a time while the response is still streaming in.
+"""
+import json
+
+FORMAT_JSON = "JSON"
+FORMAT_JSON_COMPACT_EACH_ROW = "JSONCompactEachRow"
+FORMAT_TSV = "TabSeparatedWithNamesAndTypes"
+
+_TSV_ESCAPES = {
+    "\\": "\\",
+    "t": "\t",
+    "n": "\n",
+    "r": "\r",
+    "0": "\0",
+    "b": "\b",
+    "f": "\f",
+    "'": "'",
+}
+
+
+def _decode_json(text):
+    """Decode the verbose JSON format, one object per row."""
+    data = json.loads(text)
+    names = [column["name"] for column in data.get("meta", [])]
+    return [[row.get(name) for name in names] for row in data.get("data", [])]
+
+
+def _decode_json_compact_each_row(text):
+    """Decode JSONCompactEachRow, one JSON array per line."""
+    text = text.strip()
+    if not text:
+        return []
+    # JSON strings cannot hold raw newlines, so the lines can be joined into
+    # one array and decoded in a single call
+    return json.loads(f"[{text.replace(chr(10), ',')}]")
+
+
+def _unescape_tsv(value):
+    """Undo the backslash escaping of a TabSeparated string value."""
+    if value == "\\N":
+        return None
+    if "\\" not in value:
+        return value
+    chars = []
+    escaped = False
+    for char in value:
+        if escaped:
+            chars.append(_TSV_ESCAPES.get(char, char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        else:
+            chars.append(char)
+    return "".join(chars)
+
+
+def _tsv_converter(type_name):
+    """Return the function converting a TabSeparated value of a ClickHouse type."""
+    nullable = False
+    for wrapper in ("LowCardinality(", "Nullable("):
+        if type_name.startswith(wrapper):
+            type_name = type_name[len(wrapper):-1]
+            nullable = nullable or wrapper == "Nullable("
+    if type_name.startswith(("Int", "UInt")):
+        convert = int
+    elif type_name.startswith("Float"):
+        convert = float
+    else:
+        return _unescape_tsv
+    if nullable:
+        return lambda value: None if value == "\\N" else convert(value)
+    return convert
+
+
+def _decode_tsv(text):
+    """Decode TabSeparatedWithNamesAndTypes, converting numeric columns."""
+    lines = text.splitlines()
+    if len(lines) < 2:
+        return []
+    rows = [line.split("\t") for line in lines[2:] if line]
+    # Convert column by column so every value costs a single call
+    for index, type_name in enumerate(lines[1].split("\t")):
+        convert = _tsv_converter(type_name)
+        if convert is _unescape_tsv and "\\" not in text:
+            continue
+        for row in rows:
+            row[index] = convert(row[index])
+    return rows
+
+
+def _json_compact_each_row_line_decoder():
+    """Return a decoder for single JSONCompactEachRow lines."""
+    return json.loads
+
+
+def _tsv_line_decoder():
+    """Return a decoder for single TabSeparatedWithNamesAndTypes lines."""
+    converters = None
+    header_lines = 0
+
+    def decode_line(line):
+        """Decode one line, returning None for the two header lines."""
+        nonlocal converters, header_lines
+        if header_lines < 2:
+            header_lines += 1
+            if header_lines == 2:
+                converters = [
+                    _tsv_converter(type_name) for type_name in line.split("\t")
+                ]
+            return None
+        return [convert(value) for convert, value in zip(converters, line.split("\t"))]
+
+    return decode_line
+
+
+DECODERS = {
+    FORMAT_JSON: _decode_json,
+    FORMAT_JSON_COMPACT_EACH_ROW: _decode_json_compact_each_row,
+    FORMAT_TSV: _decode_tsv,
+}
+
+
+# Formats whose rows can be decoded line by line
+LINE_DECODERS = {
+    FORMAT_JSON_COMPACT_EACH_ROW: _json_compact_each_row_line_decoder,
+    FORMAT_TSV: _tsv_line_decoder,
+}
+
+
+def decode_rows(output_format, text):
+    """Decode a response body in the given output format into rows."""
+    return DECODERS[output_format](text)
+
+
+def line_decoder(output_format):
+    """Return a function decoding one line of output into a row, or None.
+
+    The function returns None for lines that carry no row, such as headers.
+    Formats that cannot be decoded line by line have no line decoder.
+    """
+    factory = LINE_DECODERS.get(output_format)
+    return factory() if factory is not None else None
@@ -0,0 +1,85 @@
+"""Timings and counters of coordinator polls."""
+import time
+from contextlib import contextmanager
+
+
+def _ms(seconds):
+    """Return seconds as rounded milliseconds."""
+    return round(seconds * 1000, 1)
+
+
+class PollMetrics:
+    """Stage timings and sizes of a single poll.
+
+    The fetch stage covers the HTTP round trip including the decoding of the
+    streamed rows, which the client also adds up as the decode stage.
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.timings = {}
+        self.body_bytes = 0
+        self.rows = 0
+
+    def add(self, stage, seconds):
+        """Add time spent in a stage."""
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def time(self, stage):
+        """Time the enclosed block as a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def as_dict(self):
+        """Return the metrics with timings in milliseconds."""
+        timings = dict(self.timings)
+        if "fetch" in timings:
+            timings["http"] = timings["fetch"] - timings.get("decode", 0.0)
+        return {
+            **{f"{stage}_ms": _ms(seconds) for stage, seconds in timings.items()},
+            "body_bytes": self.body_bytes,
+            "rows": self.rows,
+        }
+
+
+class CoordinatorMetrics:
+    """Counters of a coordinator and the metrics of its last poll."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.polls = 0
+        self.errors = 0
+        self.rows_total = 0
+        self.last = None
+
+    def record_poll(self, metrics):
+        """Record a successful poll."""
+        self.polls += 1
+        self.rows_total += metrics.rows
+        self.last = metrics
+
+    def record_error(self, metrics):
+        """Record a failed poll."""
+        self.polls += 1
+        self.errors += 1
+        self.last = metrics
+
+    @property
+    def duration_ms(self):
+        """Return the duration of the last poll, excluding the state publish."""
+        if self.last is None:
+            return None
+        return _ms(self.last.timings.get("poll", 0.0))
+
+    def as_dict(self):
+        """Return the counters and the last poll's metrics."""
+        return {
+            "polls": self.polls,
+            "errors": self.errors,
+            "rows_total": self.rows_total,
+            "last_poll": self.last.as_dict() if self.last is not None else None,
+        }
@@ -0,0 +1,86 @@
+"""Opt-in cProfile and tracemalloc capture of coordinator polls."""
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+from datetime import datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_FILENAME = "wspr_live_profile_{timestamp}.txt"
+
+# Functions listed from the cProfile stats, by cumulative time
+TOP_FUNCTIONS = 40
+
+# Source lines listed from each poll's tracemalloc snapshot difference
+TOP_ALLOCATIONS = 20
+
+
+class PollProfiler:
+    """Profile the next polls of a coordinator and write a report.
+
+    cProfile covers the event loop thread, which runs the fetch, decoding
+    and enrichment of the async client. Work in executor threads, such as
+    the blocking client's requests and store writes, shows up as waits.
+    """
+
+    def __init__(self, path, polls=1):
+        """Arm the profiler for a number of polls."""
+        self.path = path
+        self.remaining = polls
+        self._profile = cProfile.Profile()
+        self._allocations = []
+        self._started_tracing = False
+        self._snapshot = None
+
+    @property
+    def done(self):
+        """Return whether all armed polls have been profiled."""
+        return self.remaining <= 0
+
+    def start(self):
+        """Start profiling a poll."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._snapshot = tracemalloc.take_snapshot()
+        self._profile.enable()
+
+    def stop(self):
+        """Stop profiling a poll and keep its top allocations."""
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        self._allocations.append((
+            peak,
+            snapshot.compare_to(self._snapshot, "lineno")[:TOP_ALLOCATIONS],
+        ))
+        self._snapshot = None
+        self.remaining -= 1
+        if self.done and self._started_tracing:
+            tracemalloc.stop()
+
+    def write(self):
+        """Write the report of the profiled polls."""
+        stats_text = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stats_text)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        with open(self.path, "w", encoding="utf-8") as report:
+            report.write(f"WSPR.live poll profile, {datetime.utcnow()} UTC\n\n")
+            report.write(stats_text.getvalue())
+            for poll, (peak, allocations) in enumerate(self._allocations, 1):
+                report.write(
+                    f"\nPoll {poll}: peak traced memory {peak / 1024:.1f} KiB, "
+                    "top allocations\n"
+                )
+                for allocation in allocations:
+                    report.write(f"{allocation}\n")
+        _LOGGER.info("Wrote WSPR.live poll profile to %s", self.path)
+
+
+def profile_path(hass):
+    """Return the path of a new profile report in the config directory."""
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    return hass.config.path(PROFILE_FILENAME.format(timestamp=timestamp))
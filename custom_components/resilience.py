@@ -0,0 +1,171 @@
+"""Rate limiting, retries and circuit breaking of wspr.live requests."""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import aiohttp
+import requests
+
+_LOGGER = logging.getLogger(__name__)
+
+# Requests per second to wspr.live across all sensors, with bursts up to
+# RATE_BURST requests
+RATE_LIMIT = 1.0
+RATE_BURST = 5
+
+# Transient failures are retried this often, waiting a random delay of up to
+# RETRY_BASE * 2 ** attempt seconds, capped at RETRY_CAP
+RETRIES = 3
+RETRY_BASE = 2.0
+RETRY_CAP = 30.0
+
+# Consecutive failed requests after which requests are refused for
+# BREAKER_RESET seconds
+BREAKER_THRESHOLD = 3
+BREAKER_RESET = 300
+
+# HTTP statuses worth retrying: rate limited and server side errors
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """Raised while wspr.live requests are refused after repeated failures."""
+
+
+def is_transient(err):
+    """Return whether a failed request may succeed when retried."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status in TRANSIENT_STATUSES
+    if isinstance(err, requests.HTTPError):
+        return (
+            err.response is not None
+            and err.response.status_code in TRANSIENT_STATUSES
+        )
+    return isinstance(
+        err,
+        (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            requests.ConnectionError,
+            requests.Timeout,
+        ),
+    )
+
+
+class TokenBucket:
+    """Token bucket handing out the delay each request has to wait."""
+
+    def __init__(self, rate=RATE_LIMIT, capacity=RATE_BURST):
+        """Initialize a full bucket."""
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self):
+        """Take a token and return the seconds to wait until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self._rate)
+
+
+class CircuitBreaker:
+    """Refuse requests for a while after repeated failures.
+
+    Once the reset timeout has passed a single trial request is let through;
+    its success closes the breaker and its failure opens it again.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        """Initialize a closed breaker."""
+        self._lock = threading.Lock()
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened = None
+        self._trial = False
+
+    @property
+    def state(self):
+        """Return closed, open or half_open."""
+        if self._opened is None:
+            return "closed"
+        if self._trial or time.monotonic() - self._opened >= self._reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        """Raise CircuitOpenError unless a request may be sent.
+
+        Return whether the request is the trial, which has to be ended by
+        record_success, record_failure or release_trial.
+        """
+        with self._lock:
+            if self._opened is None:
+                return False
+            if self._trial or time.monotonic() - self._opened < self._reset_timeout:
+                raise CircuitOpenError(
+                    "wspr.live requests paused after repeated failures"
+                )
+            self._trial = True
+            return True
+
+    def release_trial(self):
+        """Let another request through after a trial ended without a verdict.
+
+        This covers trials failing with a non-transient error or cancelled.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        """Close the breaker."""
+        with self._lock:
+            if self._opened is not None:
+                _LOGGER.info("wspr.live is reachable again, resuming requests")
+            self._failures = 0
+            self._opened = None
+            self._trial = False
+
+    def record_failure(self):
+        """Count a failure, opening the breaker at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._trial or (
+                self._opened is None and self._failures >= self._threshold
+            ):
+                _LOGGER.warning(
+                    "Pausing wspr.live requests for %d seconds after %d failures",
+                    self._reset_timeout, self._failures,
+                )
+                self._opened = time.monotonic()
+                self._trial = False
+
+
+class RequestGuard:
+    """Rate limit, retry policy and circuit breaker shared by the clients."""
+
+    def __init__(self):
+        """Initialize the guard."""
+        self._lock = threading.Lock()
+        self.bucket = TokenBucket()
+        self.breaker = CircuitBreaker()
+        self.retries = 0
+
+    def retry_delay(self, attempt, err):
+        """Return the jittered delay before retrying a failed request."""
+        with self._lock:
+            self.retries += 1
+        delay = random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** attempt))
+        _LOGGER.debug(
+            "Retrying wspr.live request in %.1f seconds after: %s", delay, err
+        )
+        return delay
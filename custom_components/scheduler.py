@@ -0,0 +1,36 @@
+"""Poll scheduling aligned to the WSPR transmission cycle."""
+from datetime import timedelta
+
+# WSPR transmissions start on even UTC minutes and last just under two minutes
+WSPR_CYCLE = 120
+
+# Seconds after a cycle boundary until most of its spots are decoded,
+# uploaded and queryable on wspr.live
+UPLOAD_LAG = 90
+
+
+class AdaptiveSchedule:
+    """Poll every cycle while spots arrive, backing off while a station is idle.
+
+    Each poll without new spots doubles the number of cycles until the next
+    one, up to the configured interval, and a poll with new spots resets it
+    to a single cycle. Polls are timed to land UPLOAD_LAG seconds after a
+    cycle boundary.
+    """
+
+    def __init__(self, max_interval):
+        """Initialize the schedule."""
+        self.max_cycles = max(1, int(max_interval.total_seconds()) // WSPR_CYCLE)
+        self.cycles = 1
+
+    def record(self, active):
+        """Update the backoff after a poll that did or did not bring spots."""
+        if active:
+            self.cycles = 1
+        else:
+            self.cycles = min(self.cycles * 2, self.max_cycles)
+
+    def next_interval(self, timestamp):
+        """Return the delay from a POSIX timestamp until the next poll."""
+        boundary = timestamp - (timestamp - UPLOAD_LAG) % WSPR_CYCLE
+        return timedelta(seconds=boundary + self.cycles * WSPR_CYCLE - timestamp)
@@ -0,0 +1,215 @@
+"""Services of the WSPR.live integration."""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .backfill import (
+    DATA_BACKFILLS,
+    DEFAULT_CHUNK_DAYS,
+    DEFAULT_PARALLEL,
+    async_start_backfill,
+)
+from .const import DOMAIN
+from .coordinator import DATA_COORDINATORS
+from .profiler import PollProfiler, profile_path
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BACKFILL = "backfill"
+SERVICE_GET_DIAGNOSTICS = "get_diagnostics"
+SERVICE_GET_RECORDS = "get_records"
+SERVICE_GET_SPOTS = "get_spots"
+SERVICE_PROFILE = "profile"
+
+DIRECTIONS = ("tx", "rx")
+
+BACKFILL_SCHEMA = vol.Schema({
+    vol.Required("callsign"): cv.string,
+    vol.Optional("start"): cv.date,
+    vol.Optional("chunk_days", default=DEFAULT_CHUNK_DAYS): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=366)
+    ),
+    vol.Optional("parallel", default=DEFAULT_PARALLEL): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=16)
+    ),
+})
+
+GET_RECORDS_SCHEMA = vol.Schema({
+    vol.Required("callsign"): cv.string,
+    vol.Optional("direction"): vol.In(DIRECTIONS),
+    vol.Optional("days"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Required("callsign"): cv.string,
+    vol.Optional("polls", default=1): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=10)
+    ),
+    vol.Optional("refresh", default=False): cv.boolean,
+})
+
+GET_SPOTS_SCHEMA = vol.Schema({
+    vol.Required("callsign"): cv.string,
+    vol.Optional("direction"): vol.In(DIRECTIONS),
+})
+
+
+def _directions(call):
+    """Return the directions requested by a service call."""
+    if "direction" in call.data:
+        return (call.data["direction"],)
+    return DIRECTIONS
+
+
+def async_register_spot_services(hass):
+    """Register the service returning the current spot windows."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_SPOTS):
+        return
+
+    async def async_get_spots(call):
+        """Return the spots of a callsign held by its coordinator."""
+        callsign = call.data["callsign"].upper()
+        coordinators = hass.data.get(DOMAIN, {}).get(DATA_COORDINATORS, {})
+        spots = {direction: [] for direction in _directions(call)}
+        for coordinator in coordinators.values():
+            if coordinator.data is None or callsign not in coordinator.callsigns:
+                continue
+            station = coordinator.data["stations"][callsign]
+            spots = {
+                direction: [spot.as_dict() for spot in station[direction]]
+                for direction in _directions(call)
+            }
+            break
+        return {"callsign": callsign, "spots": spots}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SPOTS,
+        async_get_spots,
+        schema=GET_SPOTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def async_register_store_services(hass, store):
+    """Register the services that read the spot store."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_RECORDS):
+        return
+
+    async def async_get_records(call):
+        """Return the stored records of a callsign."""
+        callsign = call.data["callsign"].upper()
+        records = {}
+        for direction in _directions(call):
+            if "days" in call.data:
+                records[direction] = await hass.async_add_executor_job(
+                    store.records, callsign, direction, call.data["days"]
+                )
+            else:
+                records[direction] = await hass.async_add_executor_job(
+                    store.all_records, callsign, direction
+                )
+        return {"callsign": callsign, "records": records}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_RECORDS,
+        async_get_records,
+        schema=GET_RECORDS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def async_register_backfill_service(hass, client, store, output_format, pool=None):
+    """Register the service loading a callsign's history into the store."""
+    if hass.services.has_service(DOMAIN, SERVICE_BACKFILL):
+        return
+
+    async def async_backfill(call):
+        """Start a backfill of a callsign."""
+        options = {
+            "chunk_days": call.data["chunk_days"],
+            "parallel": call.data["parallel"],
+            "output_format": output_format,
+            "pool": pool,
+        }
+        if "start" in call.data:
+            options["start"] = call.data["start"]
+        async_start_backfill(
+            hass, client, store, call.data["callsign"].upper(), **options
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKFILL, async_backfill, schema=BACKFILL_SCHEMA
+    )
+
+
+def async_register_diagnostics_service(hass):
+    """Register the service returning the poll metrics of every coordinator."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_DIAGNOSTICS):
+        return
+
+    async def async_get_diagnostics(call):
+        """Return a dump of the poll metrics and running backfills."""
+        domain_data = hass.data.get(DOMAIN, {})
+        return {
+            "coordinators": {
+                coordinator.name: {
+                    "callsigns": list(coordinator.callsigns),
+                    "update_interval": str(coordinator.update_interval),
+                    "last_update_success": coordinator.last_update_success,
+                    **coordinator.diagnostics(),
+                }
+                for coordinator in domain_data.get(DATA_COORDINATORS, {}).values()
+            },
+            "backfills": {
+                callsign: {
+                    "chunks_total": backfill.chunks_total,
+                    "chunks_done": backfill.chunks_done,
+                    "chunks_failed": backfill.chunks_failed,
+                    "rows": backfill.rows,
+                    "rows_per_second": round(backfill.rows_per_second),
+                }
+                for callsign, backfill in domain_data.get(DATA_BACKFILLS, {}).items()
+            },
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_DIAGNOSTICS,
+        async_get_diagnostics,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def async_register_profile_service(hass):
+    """Register the service profiling the next polls of a callsign."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def async_profile(call):
+        """Arm the profiler of the coordinator polling a callsign."""
+        callsign = call.data["callsign"].upper()
+        coordinators = hass.data.get(DOMAIN, {}).get(DATA_COORDINATORS, {})
+        if any(coordinator.profiler for coordinator in coordinators.values()):
+            raise HomeAssistantError("A WSPR.live profile is already being captured")
+        for coordinator in coordinators.values():
+            if callsign in coordinator.callsigns:
+                break
+        else:
+            raise HomeAssistantError(f"No WSPR.live sensor polls {callsign}")
+        coordinator.profiler = PollProfiler(profile_path(hass), call.data["polls"])
+        _LOGGER.info(
+            "Profiling the next %d polls of %s to %s",
+            call.data["polls"], coordinator.name, coordinator.profiler.path,
+        )
+        if call.data["refresh"]:
+            await coordinator.async_request_refresh()
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
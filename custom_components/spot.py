@@ -0,0 +1,51 @@
+"""Compact in-memory representation of a WSPR.live spot."""
+from sys import intern
+
+
+class Spot:
+    """A single spot, stored without a per-instance dict.
+
+    Callsigns, band labels and countries repeat across many spots, so they
+    are interned and every spot refers to one shared copy of each string.
+    """
+
+    __slots__ = (
+        "time", "tx", "rx", "band", "band_label", "snr", "distance",
+        "distance_miles", "country", "bearing",
+    )
+
+    def __init__(
+        self, time, tx, rx, band, band_label, snr, distance, distance_miles, country,
+        bearing=None,
+    ):
+        """Initialize the spot."""
+        self.time = time
+        self.tx = intern(tx) if tx else tx
+        self.rx = intern(rx) if rx else rx
+        self.band = band
+        self.band_label = intern(band_label)
+        self.snr = snr
+        self.distance = distance
+        self.distance_miles = distance_miles
+        self.country = intern(country)
+        self.bearing = bearing
+
+    @property
+    def key(self):
+        """Return the identity of the spot, used to drop re-read duplicates."""
+        return (self.time, self.tx, self.rx, self.band)
+
+    def as_dict(self):
+        """Return the spot as the dict published in sensor attributes."""
+        return {
+            "tx": self.tx,
+            "rx": self.rx,
+            "band": self.band,
+            "band_label": self.band_label,
+            "snr": self.snr,
+            "distance": self.distance,
+            "distance_miles": self.distance_miles,
+            "bearing": self.bearing,
+            "time": self.time,
+            "country": self.country,
+        }
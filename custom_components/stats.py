@@ -0,0 +1,128 @@
+"""Running per-station statistics over sliding time windows."""
+import heapq
+from datetime import timedelta
+
+# Sliding windows of the statistics
+STATISTICS_WINDOWS = {"24h": timedelta(days=1), "7d": timedelta(days=7)}
+
+# Heaps are rebuilt once they hold this many times more entries than
+# spots in the window, bounding the memory of expired entries
+COMPACT_RATIO = 2
+
+
+class WindowStats:
+    """Aggregates of a station's spots within a sliding time window.
+
+    Spots are added as polls bring them and expire as the window moves, both
+    in O(log n) per spot. Distinct countries and stations are counted per
+    value. The furthest spot and the best SNR per band are kept in max-heaps
+    whose entries for expired spots are dropped once they reach the top.
+    """
+
+    def __init__(self):
+        """Initialize an empty window."""
+        # Spot key -> (spot, other station)
+        self._spots = {}
+        self._expiry = []
+        self._distance = []
+        self._snr = {}
+        self._countries = {}
+        self._stations = {}
+
+    @staticmethod
+    def _count(counts, value, change):
+        """Change the count of a value, dropping it at zero."""
+        count = counts.get(value, 0) + change
+        if count:
+            counts[value] = count
+        else:
+            del counts[value]
+
+    def add(self, spot, other):
+        """Add a spot unless it is already in the window."""
+        key = spot.key
+        if not spot.time or key in self._spots:
+            return
+        self._spots[key] = (spot, other)
+        heapq.heappush(self._expiry, (spot.time, key))
+        if spot.distance is not None:
+            heapq.heappush(self._distance, (-spot.distance, spot.time, key))
+        if spot.snr is not None:
+            heapq.heappush(
+                self._snr.setdefault(spot.band_label, []), (-spot.snr, spot.time, key)
+            )
+        self._count(self._countries, spot.country, 1)
+        self._count(self._stations, other, 1)
+
+    def expire(self, cutoff):
+        """Drop the spots older than cutoff."""
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, key = heapq.heappop(self._expiry)
+            spot, other = self._spots.pop(key)
+            self._count(self._countries, spot.country, -1)
+            self._count(self._stations, other, -1)
+
+        limit = COMPACT_RATIO * len(self._spots)
+        if len(self._distance) > limit:
+            self._distance = self._live(self._distance)
+        for band in list(self._snr):
+            if len(self._snr[band]) > limit:
+                self._snr[band] = self._live(self._snr[band])
+                if not self._snr[band]:
+                    del self._snr[band]
+
+    def _live(self, heap):
+        """Return a heap of the entries of spots still in the window."""
+        live = [entry for entry in heap if entry[-1] in self._spots]
+        heapq.heapify(live)
+        return live
+
+    def _top(self, heap):
+        """Return the top entry of a heap still in the window."""
+        while heap and heap[0][-1] not in self._spots:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def snapshot(self):
+        """Return the statistics of the window."""
+        furthest = self._top(self._distance)
+        best_snr = {}
+        for band, heap in self._snr.items():
+            top = self._top(heap)
+            if top is not None:
+                best_snr[band] = -top[0]
+        record = {
+            "spots": len(self._spots),
+            "max_distance": None,
+            "max_distance_callsign": None,
+            "max_distance_time": None,
+            "best_snr": max(best_snr.values(), default=None),
+            "best_snr_by_band": best_snr,
+            "unique_countries": len(self._countries),
+            "unique_stations": len(self._stations),
+        }
+        if furthest is not None:
+            spot, other = self._spots[furthest[-1]]
+            record["max_distance"] = spot.distance
+            record["max_distance_callsign"] = other
+            record["max_distance_time"] = spot.time
+        return record
+
+
+class StationStats:
+    """Statistics of a station's TX or RX spots over every window."""
+
+    def __init__(self, mode):
+        """Initialize the statistics."""
+        self._mode = mode
+        self._windows = {name: WindowStats() for name in STATISTICS_WINDOWS}
+
+    def add_spots(self, spots, now, time_format):
+        """Add the spots of a poll, expire old ones and return the snapshots."""
+        snapshots = {}
+        for name, stats in self._windows.items():
+            for spot in spots:
+                stats.add(spot, spot.rx if self._mode == "tx" else spot.tx)
+            stats.expire((now - STATISTICS_WINDOWS[name]).strftime(time_format))
+            snapshots[name] = stats.snapshot()
+        return snapshots
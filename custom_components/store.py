@@ -0,0 +1,306 @@
+"""Persistent SQLite store of WSPR.live spots."""
+import asyncio
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_STORE = "store"
+
+STORE_FILENAME = "wspr_live.db"
+
+DAY_FORMAT = "%Y-%m-%d"
+
+# Record periods in days, None meaning all time
+RECORD_PERIODS = {"7d": 7, "30d": 30, "all": None}
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS spots ("
+    "callsign TEXT NOT NULL, "
+    "direction TEXT NOT NULL, "
+    "time TEXT NOT NULL, "
+    "tx_sign TEXT NOT NULL, "
+    "rx_sign TEXT NOT NULL, "
+    "band INTEGER NOT NULL, "
+    "band_label TEXT, "
+    "snr INTEGER, "
+    "distance INTEGER, "
+    "country TEXT, "
+    "bearing INTEGER, "
+    "PRIMARY KEY (callsign, direction, time, tx_sign, rx_sign, band)"
+    ") WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS spots_band_time ON spots (band, time)",
+    "CREATE INDEX IF NOT EXISTS spots_callsign_distance "
+    "ON spots (callsign, direction, distance)",
+    "CREATE TABLE IF NOT EXISTS backfill_ranges ("
+    "callsign TEXT NOT NULL, "
+    "start TEXT NOT NULL, "
+    "end TEXT NOT NULL, "
+    "rows INTEGER NOT NULL, "
+    "PRIMARY KEY (callsign, start, end)"
+    ") WITHOUT ROWID",
+)
+
+# Daily aggregates and the last day each country and station was heard,
+# kept up to date as spots are added so records need no scan of the spots
+ROLLUP_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS record_days ("
+    "callsign TEXT NOT NULL, "
+    "direction TEXT NOT NULL, "
+    "day TEXT NOT NULL, "
+    "spots INTEGER NOT NULL, "
+    "best_snr INTEGER, "
+    "max_distance INTEGER, "
+    "max_distance_callsign TEXT, "
+    "max_distance_time TEXT, "
+    "max_distance_band TEXT, "
+    "PRIMARY KEY (callsign, direction, day)"
+    ") WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS record_countries ("
+    "callsign TEXT NOT NULL, "
+    "direction TEXT NOT NULL, "
+    "country TEXT NOT NULL, "
+    "last_day TEXT NOT NULL, "
+    "PRIMARY KEY (callsign, direction, country)"
+    ") WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS record_stations ("
+    "callsign TEXT NOT NULL, "
+    "direction TEXT NOT NULL, "
+    "station TEXT NOT NULL, "
+    "last_day TEXT NOT NULL, "
+    "PRIMARY KEY (callsign, direction, station)"
+    ") WITHOUT ROWID",
+)
+
+# Spots of an add_spots call not stored yet
+INCOMING_SCHEMA = (
+    "CREATE TEMP TABLE incoming AS SELECT * FROM spots WHERE 0",
+    "CREATE UNIQUE INDEX temp.incoming_key "
+    "ON incoming (callsign, direction, time, tx_sign, rx_sign, band)",
+)
+
+INSERT_INCOMING = (
+    "INSERT OR IGNORE INTO incoming (callsign, direction, time, tx_sign, "
+    "rx_sign, band, band_label, snr, distance, country, bearing) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+DROP_STORED_INCOMING = (
+    "DELETE FROM incoming WHERE EXISTS ("
+    "SELECT 1 FROM spots WHERE spots.callsign = incoming.callsign "
+    "AND spots.direction = incoming.direction AND spots.time = incoming.time "
+    "AND spots.tx_sign = incoming.tx_sign AND spots.rx_sign = incoming.rx_sign "
+    "AND spots.band = incoming.band)"
+)
+
+# The other station of a spot: the receiver of TX spots, the sender of RX spots
+OTHER_SIGN = "CASE direction WHEN 'tx' THEN rx_sign ELSE tx_sign END"
+
+# Statements adding the incoming spots to the rollups. The furthest spot is
+# a separate statement, as SQLite takes the bare columns of an aggregate
+# query from the max() row only when there is one max().
+ROLLUP = (
+    "INSERT INTO record_days (callsign, direction, day, spots, best_snr) "
+    "SELECT callsign, direction, substr(time, 1, 10), COUNT(*), MAX(snr) "
+    "FROM incoming WHERE true GROUP BY callsign, direction, substr(time, 1, 10) "
+    "ON CONFLICT (callsign, direction, day) DO UPDATE "
+    "SET spots = spots + excluded.spots, "
+    "best_snr = CASE WHEN best_snr IS NULL OR excluded.best_snr > best_snr "
+    "THEN excluded.best_snr ELSE best_snr END",
+    "INSERT INTO record_days (callsign, direction, day, spots, max_distance, "
+    "max_distance_callsign, max_distance_time, max_distance_band) "
+    "SELECT callsign, direction, substr(time, 1, 10), 0, MAX(distance), "
+    f"{OTHER_SIGN}, time, band_label "
+    "FROM incoming WHERE distance IS NOT NULL "
+    "GROUP BY callsign, direction, substr(time, 1, 10) "
+    "ON CONFLICT (callsign, direction, day) DO UPDATE "
+    "SET max_distance = excluded.max_distance, "
+    "max_distance_callsign = excluded.max_distance_callsign, "
+    "max_distance_time = excluded.max_distance_time, "
+    "max_distance_band = excluded.max_distance_band "
+    "WHERE max_distance IS NULL OR excluded.max_distance > max_distance",
+    "INSERT INTO record_countries (callsign, direction, country, last_day) "
+    "SELECT callsign, direction, country, MAX(substr(time, 1, 10)) "
+    "FROM incoming WHERE country IS NOT NULL GROUP BY callsign, direction, country "
+    "ON CONFLICT (callsign, direction, country) DO UPDATE "
+    "SET last_day = MAX(last_day, excluded.last_day)",
+    "INSERT INTO record_stations (callsign, direction, station, last_day) "
+    f"SELECT callsign, direction, {OTHER_SIGN}, MAX(substr(time, 1, 10)) "
+    f"FROM incoming WHERE true GROUP BY callsign, direction, {OTHER_SIGN} "
+    "ON CONFLICT (callsign, direction, station) DO UPDATE "
+    "SET last_day = MAX(last_day, excluded.last_day)",
+)
+
+RECORD_TOTALS = (
+    "SELECT COALESCE(SUM(spots), 0), MAX(best_snr) FROM record_days "
+    "WHERE callsign = ? AND direction = ? AND day >= ?"
+)
+
+RECORD_FURTHEST = (
+    "SELECT max_distance, max_distance_callsign, max_distance_time, "
+    "max_distance_band FROM record_days "
+    "WHERE callsign = ? AND direction = ? AND day >= ? "
+    "AND max_distance IS NOT NULL ORDER BY max_distance DESC LIMIT 1"
+)
+
+RECORD_COUNTRIES = (
+    "SELECT COUNT(*) FROM record_countries "
+    "WHERE callsign = ? AND direction = ? AND last_day >= ?"
+)
+
+RECORD_STATIONS = (
+    "SELECT COUNT(*) FROM record_stations "
+    "WHERE callsign = ? AND direction = ? AND last_day >= ?"
+)
+
+
+class SpotStore:
+    """Append-only history of spots with daily rollups for record queries."""
+
+    def __init__(self, path):
+        """Open the database, creating the schema when needed."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            for statement in SCHEMA + ROLLUP_SCHEMA + INCOMING_SCHEMA:
+                self._connection.execute(statement)
+
+    def add_spots(self, callsign, direction, spots):
+        """Store spots of a callsign, ignoring ones already stored.
+
+        Only the spots not stored before are added to the rollups.
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                INSERT_INCOMING,
+                [
+                    (
+                        callsign, direction, spot.time, spot.tx, spot.rx,
+                        spot.band, spot.band_label, spot.snr,
+                        spot.distance, spot.country, spot.bearing,
+                    )
+                    for spot in spots
+                    if spot.time
+                ],
+            )
+            self._connection.execute(DROP_STORED_INCOMING)
+            self._connection.execute("INSERT INTO spots SELECT * FROM incoming")
+            for statement in ROLLUP:
+                self._connection.execute(statement)
+            self._connection.execute("DELETE FROM incoming")
+
+    def spot_rows(self, callsign, direction, since):
+        """Return the stored spot rows of a callsign since a time, newest first."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT time, tx_sign, rx_sign, band, snr, distance, bearing "
+                "FROM spots "
+                "WHERE callsign = ? AND direction = ? AND time >= ? "
+                "ORDER BY time DESC",
+                (callsign, direction, since),
+            ).fetchall()
+
+    def completed_chunks(self, callsign):
+        """Return the (start, end) time ranges backfilled for a callsign."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT start, end FROM backfill_ranges WHERE callsign = ? "
+                "ORDER BY start",
+                (callsign,),
+            ).fetchall()
+
+    def complete_chunk(self, callsign, start, end, spots):
+        """Store the spots of a backfilled chunk and checkpoint its range."""
+        self.add_spots(callsign, "tx", spots["tx"])
+        self.add_spots(callsign, "rx", spots["rx"])
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO backfill_ranges (callsign, start, end, rows) "
+                "VALUES (?, ?, ?, ?)",
+                (callsign, start, end, len(spots["tx"]) + len(spots["rx"])),
+            )
+
+    def records(self, callsign, direction, days=None):
+        """Return the records of a callsign over the last days, or all time.
+
+        Records are read from the daily rollups, so a period starts at
+        midnight UTC of the day that many days ago.
+        """
+        since = ""
+        if days is not None:
+            since = (datetime.utcnow() - timedelta(days=days)).strftime(DAY_FORMAT)
+        params = (callsign, direction, since)
+        with self._lock:
+            total, best_snr = self._connection.execute(
+                RECORD_TOTALS, params
+            ).fetchone()
+            furthest = self._connection.execute(RECORD_FURTHEST, params).fetchone()
+            (countries,) = self._connection.execute(
+                RECORD_COUNTRIES, params
+            ).fetchone()
+            (stations,) = self._connection.execute(
+                RECORD_STATIONS, params
+            ).fetchone()
+        record = {
+            "spots": total,
+            "best_snr": best_snr,
+            "unique_countries": countries,
+            "unique_stations": stations,
+            "max_distance": None,
+            "max_distance_callsign": None,
+            "max_distance_time": None,
+            "max_distance_band": None,
+        }
+        if furthest is not None:
+            (
+                record["max_distance"],
+                record["max_distance_callsign"],
+                record["max_distance_time"],
+                record["max_distance_band"],
+            ) = furthest
+        return record
+
+    def all_records(self, callsign, direction):
+        """Return the records of a callsign for every record period."""
+        return {
+            period: self.records(callsign, direction, days)
+            for period, days in RECORD_PERIODS.items()
+        }
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._connection.close()
+
+
+async def async_get_store(hass):
+    """Return the spot store of this instance, opening it on first use.
+
+    The store is kept in hass.data as the future of its opening, so platform
+    entries set up at the same time share one store and its lock.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    opening = domain_data.get(DATA_STORE)
+    if opening is not None:
+        return await asyncio.shield(opening)
+
+    opening = hass.async_add_executor_job(SpotStore, hass.config.path(STORE_FILENAME))
+    domain_data[DATA_STORE] = opening
+    try:
+        store = await asyncio.shield(opening)
+    except Exception:
+        del domain_data[DATA_STORE]
+        raise
+
+    async def close_store(event):
+        """Close the store when Home Assistant stops."""
+        await hass.async_add_executor_job(store.close)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, close_store)
+    return store
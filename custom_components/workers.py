@@ -0,0 +1,90 @@
+"""Worker processes enriching large batches of spots."""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from .const import DOMAIN
+from .coordinator import build_spots
+from .enrich import ENRICHED_COLUMNS, enrich_rows
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_ENRICHMENT_POOL = "enrichment_pool"
+
+# Batches smaller than this are enriched in-process, where they take a few
+# milliseconds, less than sending them to worker processes would
+PARALLEL_MIN_ROWS = 20_000
+
+# Rows sent to a worker process at a time
+CHUNK_ROWS = 10_000
+
+
+class EnrichmentPool:
+    """Spread the enrichment of large batches over worker processes.
+
+    Enrichment is pure Python and holds the GIL, so threads cannot run it in
+    parallel. Worker processes return the derived columns only, as pickling
+    whole spots back costs more than building them in this process. The
+    processes are started on first use, with the spawn method, which is
+    safe in a process running threads.
+    """
+
+    def __init__(self, workers):
+        """Initialize the pool."""
+        self.workers = workers
+        self._executor = None
+
+    def _get_executor(self):
+        """Return the process pool, starting it on first use."""
+        if self._executor is None:
+            _LOGGER.debug("Starting %d enrichment worker processes", self.workers)
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def async_build_spots(self, hass, rows, mode):
+        """Return the spots of a batch of rows, in the order of the rows."""
+        if len(rows) < PARALLEL_MIN_ROWS:
+            return build_spots(rows, mode)
+        if self.workers <= 1:
+            return await hass.async_add_executor_job(build_spots, rows, mode)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(
+                executor, enrich_rows, mode, rows[start:start + CHUNK_ROWS]
+            )
+            for start in range(0, len(rows), CHUNK_ROWS)
+        ))
+        columns = {
+            column: [value for part in parts for value in part[column]]
+            for column in ENRICHED_COLUMNS
+        }
+        return await hass.async_add_executor_job(build_spots, rows, mode, columns)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+def async_get_enrichment_pool(hass, workers=1):
+    """Return the enrichment pool of this instance, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    pool = domain_data.get(DATA_ENRICHMENT_POOL)
+    if pool is None:
+        pool = EnrichmentPool(workers)
+        domain_data[DATA_ENRICHMENT_POOL] = pool
+
+        async def shutdown_pool(event):
+            """Stop the worker processes when Home Assistant stops."""
+            await hass.async_add_executor_job(pool.shutdown)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown_pool)
+    return pool